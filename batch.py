@@ -0,0 +1,122 @@
+import argparse
+import time
+
+import numpy as np
+
+from conways import count_neighbors, parse_rule, TOPOLOGIES
+from cycles import CycleDetector, mix
+from soups import random_board
+
+
+def pad_stack(stack, topology='torus'):
+    """Pads every board in an (N, rows, columns) stack, see conways.pad_board"""
+    if topology == 'dead':
+        return np.pad(stack, ((0, 0), (1, 1), (1, 1)))
+
+    padded = np.pad(stack, ((0, 0), (1, 1), (1, 1)), mode='wrap')
+    if topology == 'klein':
+        # Rows across the top and bottom edges come back flipped
+        padded[:, 0] = padded[:, -2, ::-1]
+        padded[:, -1] = padded[:, 1, ::-1]
+    return padded
+
+
+def run_soups(count=None, shape=(32, 32), weight=0.35, seeds=None, rule='B3/S23',
+                topology='torus', max_generations=10000, random_seed=None):
+    """
+        Runs a batch of random soups side by side as one (N, rows, columns)
+        stack until each of them settles into a cycle. Soups that settle are
+        dropped from the stack, so the rest keep stepping without them.
+
+         Parameters:
+        -------------------
+        count (int):            number of random soups
+        shape (tuple):          rows and columns of each soup
+        weight (float):         probability a cell starts alive
+        seeds (np.array):       starting boards to run instead of random soups
+        rule (str):             Life-like rulestring, see conways.parse_rule
+        topology (str):         'torus', 'dead' or 'klein'
+        max_generations (int):  soups still running after this are given up on
+        random_seed (int):      seed for the random soups
+
+         Returns:
+        -------------------
+        results (dict):         arrays with an entry per soup -
+                                lifespan, the generation its cycle starts
+                                (max_generations if it never settled),
+                                population, its final number of live cells, and
+                                period, its cycle's period (0 if it never settled)
+    """
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown topology '{topology}', expected one of {TOPOLOGIES}")
+    table = parse_rule(rule)
+
+    if seeds is not None:
+        stack = (np.asarray(seeds) > 0).astype(np.uint8)
+    else:
+        rng = np.random.default_rng(random_seed)
+        # Drawn like Life's random boards, each soup being the next rows
+        rows, cols = shape
+        stack = random_board(rng, (count * rows, cols), weight).reshape(count, rows, cols)
+    count, rows, cols = stack.shape
+
+    # Same hashes as cycles.hash_cells, for a whole stack at once
+    keys = (mix(np.arange(rows * cols)) | np.uint64(1)).reshape(rows, cols)
+
+    lifespan = np.full(count, max_generations)
+    population = np.zeros(count, dtype=np.int64)
+    period = np.zeros(count, dtype=np.int64)
+
+    ids = np.arange(count)
+    detectors = [CycleDetector() for _ in range(count)]
+    generation = 0
+    while len(ids):
+        hashes = np.bitwise_xor.reduce(np.where(stack > 0, keys, np.uint64(0)), axis=(1, 2))
+        done = np.zeros(len(ids), dtype=bool)
+        for i, (soup, key) in enumerate(zip(ids, hashes.tolist())):
+            cycle = detectors[soup].update(generation, key)
+            if cycle or generation == max_generations:
+                done[i] = True
+                if cycle:
+                    lifespan[soup], period[soup] = cycle
+
+        if done.any():
+            population[ids[done]] = np.count_nonzero(stack[done], axis=(1, 2))
+            ids = ids[~done]
+            stack = stack[~done]
+            if not len(ids):
+                break
+
+        counts = count_neighbors(pad_stack(stack, topology))
+        stack = table[stack, counts].view(np.uint8)
+        generation += 1
+
+    return {'lifespan': lifespan, 'population': population, 'period': period}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a batch of random soups until they settle')
+    parser.add_argument('count', type=int, help='number of soups')
+    parser.add_argument('--shape', type=int, nargs=2, default=(32, 32))
+    parser.add_argument('--weight', type=float, default=0.35)
+    parser.add_argument('--rule', default='B3/S23')
+    parser.add_argument('--topology', default='torus', choices=TOPOLOGIES)
+    parser.add_argument('--max-generations', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run_soups(
+        args.count, tuple(args.shape), args.weight, rule=args.rule, topology=args.topology,
+        max_generations=args.max_generations, random_seed=args.seed
+    )
+    elapsed = time.perf_counter() - start
+
+    settled = results['period'] > 0
+    print(f'{args.count} soups in {elapsed:.2f}s ({args.count / elapsed:.1f} soups/s)')
+    print(f'settled: {settled.sum()}, mean lifespan: {results["lifespan"][settled].mean():.1f}')
+    print(f'periods: {dict(zip(*np.unique(results["period"][settled], return_counts=True)))}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from conways import ENGINES, Life
+
+SIZES = [64, 256, 1024, 4096]
+WEIGHTS = [0.1, 0.35, 0.6]
+CLASSES = [1, 4]
+
+
+def git_commit():
+    """The commit being benchmarked, with a + on the end if the tree has changes"""
+    # Ask the repository bench.py is in, wherever it's run from
+    repo = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True, cwd=repo
+        ).stdout.strip()
+        dirty = subprocess.run(['git', 'diff', '--quiet', 'HEAD', '--', '*.py'], cwd=repo).returncode
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('+' if dirty else '')
+
+
+def bench_case(size, weight, classes, engine, min_time=1.0, max_generations=1000, random_seed=0):
+    """
+        Benchmarks one configuration, returning a dict of results.
+
+        Construction and stepping are timed without tracemalloc running,
+        since it slows allocation down a lot, then the game is built and
+        stepped again under tracemalloc to find its peak memory.
+
+         Parameters:
+        -------------------
+        size (int):             rows and columns of the (square) board
+        weight (float):         probability a cell starts alive
+        classes (int):          number of classes
+        engine (str):           key into conways.ENGINES
+        min_time (float):       seconds to keep stepping for, at least one
+                                generation is always stepped
+        max_generations (int):  stop stepping after this many generations
+        random_seed (int):      seed for the starting board
+    """
+    shape = (size, size)
+
+    def build():
+        return Life(shape, weight=weight, classes=classes, engine=engine, random_seed=random_seed)
+
+    start = time.perf_counter()
+    life = build()
+    startup = time.perf_counter() - start
+
+    generations = 0
+    start = time.perf_counter()
+    while generations < max_generations:
+        life.generate()
+        generations += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+
+    # A few generations are enough to see the working set
+    tracemalloc.start()
+    traced = build()
+    for _ in range(min(generations, 3)):
+        traced.generate()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'engine': engine,
+        'size': size,
+        'weight': weight,
+        'classes': classes,
+        'generations': generations,
+        'seconds': elapsed,
+        'startup_s': startup,
+        'gens_per_s': generations / elapsed,
+        'cell_updates_per_s': generations * size * size / elapsed,
+        'peak_bytes': peak,
+    }
+
+
+def run(sizes=SIZES, weights=WEIGHTS, classes=CLASSES, engines=('numpy',), output=None,
+            min_time=1.0, max_generations=1000):
+    """
+        Benchmarks every combination of parameters, writing one JSON object
+        per line so runs from different commits can be compared (see compare).
+        Combinations an engine doesn't support, like classes > 1 on the
+        packed engine, are skipped.
+    """
+    meta = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+    }
+
+    f = open(output, 'a') if output else sys.stdout
+    try:
+        for engine, size, weight, n in itertools.product(engines, sizes, weights, classes):
+            try:
+                result = bench_case(size, weight, n, engine, min_time, max_generations)
+            except ValueError as e:
+                print(f'skipping {engine} {size}x{size} classes={n}: {e}', file=sys.stderr)
+                continue
+            f.write(json.dumps({**meta, **result}) + '\n')
+            f.flush()
+    finally:
+        if output:
+            f.close()
+
+
+def _load(path):
+    """Results in a file, keyed by configuration. Later lines win"""
+    with open(path) as f:
+        results = [json.loads(line) for line in f if line.strip()]
+    return {(r['engine'], r['size'], r['weight'], r['classes']): r for r in results}
+
+
+def compare(before, after):
+    """Prints the change in speed and memory for the configurations in both result files"""
+    old, new = _load(before), _load(after)
+    print(f'{"engine":<9}{"size":>6}{"weight":>8}{"classes":>9}{"gens/s":>12}{"change":>9}{"startup":>9}{"memory":>9}')
+    for key in sorted(old.keys() & new.keys()):
+        a, b = old[key], new[key]
+        engine, size, weight, classes = key
+        print(
+            f'{engine:<9}{size:>6}{weight:>8}{classes:>9}{b["gens_per_s"]:>12.1f}'
+            f'{b["gens_per_s"] / a["gens_per_s"]:>8.2f}x'
+            f'{b["startup_s"] / a["startup_s"]:>8.2f}x'
+            f'{b["peak_bytes"] / max(a["peak_bytes"], 1):>8.2f}x'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Life engines without a display')
+    sub = parser.add_subparsers(dest='command')
+
+    bench = sub.add_parser('run', help='run the benchmarks')
+    bench.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    bench.add_argument('--weights', type=float, nargs='+', default=WEIGHTS)
+    bench.add_argument('--classes', type=int, nargs='+', default=CLASSES)
+    bench.add_argument('--engines', nargs='+', default=['numpy'], choices=ENGINES)
+    bench.add_argument('--min-time', type=float, default=1.0, help='seconds to step each case for')
+    bench.add_argument('--max-generations', type=int, default=1000)
+    bench.add_argument('--output', help='JSON lines file to append to, stdout by default')
+
+    diff = sub.add_parser('compare', help='compare two result files')
+    diff.add_argument('before')
+    diff.add_argument('after')
+
+    args = parser.parse_args()
+    if args.command == 'compare':
+        compare(args.before, args.after)
+    elif args.command == 'run':
+        run(
+            args.sizes, args.weights, args.classes, args.engines, args.output,
+            args.min_time, args.max_generations,
+        )
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,7 @@ from curses import wrapper
 import numpy as np
 from time import sleep
 from conways import Life
+from runner import Runner
 
 seed = np.array([[0,1,1],[1,1,0],[0,1,0]])
 alpha = 'abcdefghijklmnopqrstuvwxyz'
@@ -12,22 +13,48 @@ num = [str(i) for i in range(10)]
 symb = list('`~!@#$%^&*()-_=+[{]}|;:\'",<.>/?]')
 chars = num + symb
 
-# def array_to_ascii(arr, char='#'):
-#     if type(char) is str:
-#         return '\n'.join([''.join(row) for row in np.array([' ', char])[arr]])
-#     elif type(char) is list:
-#         return '\n'.join([''.join([np.random.choice(char) if item else ' ' for item in row]) for row in arr])
+# Characters for dead cells and each class of live cell
+LUT = np.frombuffer((' ' + ''.join(num[1:] + alpha + symb)).encode(), dtype=np.uint8)
 
 def array_to_ascii(arr):
-    ascii = [''.join([str(item) if item else ' ' for item in row]) for row in arr]
-    return '\n'.join(ascii)
-
-def scores(game):
-    board = game.board
-    live_cells = np.count_nonzero(board)
-    counts = np.bincount(board.flatten())[1:]
-    classes = np.arange(game.classes + 1)[1:]
-    text = [f'{classes[i]}: {counts[i]}' for i in counts.argsort()[::-1] if counts[i]]
+    """Renders a board as text with one character per cell"""
+    rows = LUT[arr]
+    lines = np.column_stack([rows, np.full(len(rows), ord('\n'), dtype=np.uint8)])
+    return lines.tobytes()[:-1].decode()
+
+class Renderer:
+    """
+        Draws boards to a curses screen. After the first frame only the runs
+        of cells that changed since the last frame are rewritten, so the
+        cost of a frame follows the activity on the board, not its size
+    """
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.previous = None
+
+    def draw(self, board):
+        if self.previous is None or self.previous.shape != board.shape:
+            self.screen.addstr(0, 0, array_to_ascii(board))
+        else:
+            for y, x0, x1 in self.changed_runs(self.previous, board):
+                self.screen.addstr(y, x0, LUT[board[y, x0:x1]].tobytes().decode())
+        self.previous = board.copy()
+
+    @staticmethod
+    def changed_runs(old, new):
+        """(row, start, end) of each run of changed cells"""
+        rows, cols = new.shape
+        # A spare column of False keeps runs from wrapping onto the next row
+        changed = np.zeros((rows, cols + 1), dtype=np.int8)
+        changed[:, :cols] = old != new
+        edges = np.flatnonzero(np.diff(changed.ravel(), prepend=0))
+        starts, ends = edges[::2], edges[1::2]
+        return zip((starts // (cols + 1)).tolist(), (starts % (cols + 1)).tolist(), (ends % (cols + 1)).tolist())
+
+def scores(board):
+    counts = np.bincount(board.ravel())[1:]
+    text = [f'{i + 1}: {counts[i]}' for i in counts.argsort()[::-1] if counts[i]]
     return ' '.join(text)
 
 def pause(screen):
@@ -36,33 +63,47 @@ def pause(screen):
         key = screen.getch()
         curses.napms(200)
 
-def app(screen):
+def app(screen, mode='latest', fps=12.5, rate=None):
+    """
+        Runs the game in a terminal, drawing `fps` frames a second while the
+        simulation steps at `rate` generations a second, or as fast as it can
+        if None. In 'latest' mode generations between frames are skipped
+    """
     curses.curs_set(0)
     rows, cols = screen.getmaxyx()
     shape = (rows-3, cols-2)
     classes = 9
     game = Life(shape, weight=0.35, classes=9)
-    text = array_to_ascii(game.board)
-    if game.classes > 1:
-        hud = '\n' + scores(game)
-        text += hud + ' ' * (cols - len(hud))
-    screen.addstr(text)
-    screen.refresh()
-    screen.getch()
-    screen.nodelay(1)
+    renderer = Renderer(screen)
 
-    key = None
-    while key != ord('q'):
-        text = array_to_ascii(game.next_board)
+    def draw(board):
+        stats = game.stats
+        if stats:
+            start = stats.clock()
+        renderer.draw(board)
         if game.classes > 1:
-            hud = '\n' + scores(game)
-            text += hud + ' ' * (cols - len(hud))
-        screen.addstr(0, 0, text)
+            screen.addstr(shape[0], 0, scores(board).ljust(cols - 1))
         screen.refresh()
-        curses.napms(80)
-        key = screen.getch()
-        if key == ord(' '):
-            pause(screen)
+        if stats:
+            stats.lap('render', start)
+
+    draw(game.board)
+    screen.getch()
+    screen.nodelay(1)
+
+    # The game steps on its own thread, the screen shows whichever frame is ready
+    with Runner(game, mode=mode, rate=rate) as runner:
+        key = None
+        while key != ord('q'):
+            frame = runner.poll()
+            if frame:
+                draw(frame.board)
+            curses.napms(int(1000 / fps))
+            key = screen.getch()
+            if key == ord(' '):
+                runner.pause()
+                pause(screen)
+                runner.resume()
 
 def main():
     s = seed.shape
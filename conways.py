@@ -1,5 +1,17 @@
+import os
+import re
+import shutil
 import sys
+import tempfile
+import weakref
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from cycles import CycleDetector, hash_cells
+from hashlife import HashLifeBoard
+from profiling import Stats
+from soups import CHUNK, random_board, random_rows
+from sparse import SparseBoard
 
 R_PENTOMINO = np.array([
     [0, 1, 1],
@@ -7,11 +19,175 @@ R_PENTOMINO = np.array([
     [0, 1, 0]
 ])
 
+TOPOLOGIES = ('torus', 'dead', 'klein')
+
+RULES = {
+    'life': 'B3/S23',
+    'highlife': 'B36/S23',
+    'daynight': 'B3678/S34678',
+    'seeds': 'B2/S',
+}
+
+
+def parse_rule(rule):
+    """
+        Compiles a Life-like rulestring into a lookup table, where
+        table[state, neighbors] is the cell's next state
+
+        Accepts B/S notation ('B36/S23'), the older S/B notation
+        ('23/36') or one of the names in RULES
+    """
+    rulestring = RULES.get(rule.lower(), rule).upper().replace(' ', '')
+    match = re.fullmatch(r'B([0-8]*)/S([0-8]*)|S([0-8]*)/B([0-8]*)|([0-8]*)/([0-8]*)', rulestring)
+    if not match:
+        raise ValueError(f"Can't parse rule '{rule}'")
+
+    if match[1] is not None:
+        births, survivals = match[1], match[2]
+    elif match[3] is not None:
+        survivals, births = match[3], match[4]
+    else:   # S/B notation without letters
+        survivals, births = match[5], match[6]
+
+    table = np.zeros((2, 9), dtype=bool)
+    table[0, [int(n) for n in births]] = True
+    table[1, [int(n) for n in survivals]] = True
+    return table
+
+
+def pad_board(array, topology='torus', out=None):
+    """
+        Pads a board by one cell on each side with the cells across its edges,
+        writing into `out` when it's given
+
+         Topologies:
+        -------------------
+        torus:      opposite edges are joined
+        dead:       everything past the edges is dead
+        klein:      left and right edges are joined, top and bottom are
+                    joined with the board flipped left to right
+    """
+    rows, cols = array.shape
+    padded = np.empty((rows+2, cols+2), dtype=array.dtype) if out is None else out
+    padded[1:-1, 1:-1] = array
+
+    if topology == 'dead':
+        padded[0] = padded[-1] = 0
+        padded[:, 0] = padded[:, -1] = 0
+        return padded
+
+    if topology == 'klein':
+        padded[0, 1:-1] = array[-1, ::-1]
+        padded[-1, 1:-1] = array[0, ::-1]
+    else:
+        padded[0, 1:-1] = array[-1]
+        padded[-1, 1:-1] = array[0]
+    padded[:, 0] = padded[:, -2]
+    padded[:, -1] = padded[:, 1]
+    return padded
+
+
+def board_window(array, y0, y1, x0, x1, topology='torus'):
+    """
+        Returns array[y0:y1, x0:x1] padded by one cell of its neighbors,
+        with edges following the topology. Away from the edges this is a view
+    """
+    rows, cols = array.shape
+    if y0 > 0 and x0 > 0 and y1 < rows and x1 < cols:
+        return array[y0-1:y1+1, x0-1:x1+1]
+
+    ys = np.arange(y0 - 1, y1 + 1)[:, None]
+    xs = np.arange(x0 - 1, x1 + 1)[None, :]
+    across = (ys < 0) | (ys >= rows)    # Rows across the top or bottom edge
+    if topology == 'klein':
+        xs = np.where(across, cols - 1 - xs, xs)
+
+    window = array[ys % rows, xs % cols]
+    if topology == 'dead':
+        window[across | (xs < 0) | (xs >= cols)] = 0
+    return window
+
+
+def count_neighbors(padded, out=None):
+    """
+        Sums the eight shifted views of a padded board,
+        or of each board in a stack padded along its last two axes
+    """
+    rows, cols = padded.shape[-2]-2, padded.shape[-1]-2
+    if out is None:
+        counts = np.zeros(padded.shape[:-2] + (rows, cols), dtype=np.uint8)
+    else:
+        counts = out
+        counts.fill(0)
+
+    for i in range(3):
+        for j in range(3):
+            if (i, j) == (1, 1):
+                continue
+            counts += padded[..., i:i+rows, j:j+cols]
+    return counts
+
+
+def pack_rows(alive):
+    """Packs each row of a binary board into little endian uint64 words"""
+    rows, cols = alive.shape
+    packed = np.packbits(alive > 0, axis=1, bitorder='little')
+    words = np.zeros((rows, -(-cols // 64) * 8), dtype=np.uint8)
+    words[:, :packed.shape[1]] = packed
+    return words.view('<u8').astype(np.uint64)
+
+
+def unpack_rows(words, cols):
+    """Unpacks uint64 words back into a binary uint8 board"""
+    as_bytes = words.astype('<u8').view(np.uint8)
+    return np.unpackbits(as_bytes, axis=1, count=cols, bitorder='little')
+
+
+def _shift_west(words, cols, wrap):
+    """Each bit takes the value of the cell to its left"""
+    shifted = words << np.uint64(1)
+    shifted[:, 1:] |= words[:, :-1] >> np.uint64(63)
+    if wrap:
+        # The cell left of the first column is the last column
+        shifted[:, 0] |= (words[:, -1] >> np.uint64((cols - 1) % 64)) & np.uint64(1)
+    return shifted
+
+
+def _shift_east(words, cols, wrap):
+    """Each bit takes the value of the cell to its right"""
+    shifted = words >> np.uint64(1)
+    shifted[:, :-1] |= words[:, 1:] << np.uint64(63)
+    if wrap:
+        # The cell right of the last column is the first column
+        shifted[:, -1] |= (words[:, 0] & np.uint64(1)) << np.uint64((cols - 1) % 64)
+    return shifted
+
+
+def _reverse_rows(words, cols):
+    """Flips packed rows left to right"""
+    return pack_rows(unpack_rows(words, cols)[:, ::-1])
+
+
+def _add_plane(sums, plane):
+    """Ripple adds a one bit plane into a counter stored as bit planes"""
+    carry = plane
+    for i, bits in enumerate(sums):
+        sums[i], carry = bits ^ carry, bits & carry
+
+
+def _tail_mask(cols):
+    """Mask of the bits in a row's last word that hold real cells"""
+    tail = cols % 64
+    return np.uint64((1 << tail) - 1 if tail else (1 << 64) - 1)
+
 class Cell:
     """
         The cell will have access to the game board, it will look at
         its own neighbors and apply the rules to the game of life,
         returning its updated status
+
+        Cells are views created on demand by the Board, the board's
+        array is the only place their state is stored between generations
     """
     cell_class = None
     mutation_prob = 0.001
@@ -20,10 +196,9 @@ class Cell:
         self.loc = loc
         self.board = board
 
-        # Get initial status from the starting board array
+        # Get initial status from the starting board array, neighbors
+        # are looked at by update (or update_neighbors)
         self.status = int(self.board.array[loc] > 0)
-        # Get initial neighbors
-        self.update_neighbors()
 
         if board.classes > 1:
             self.cell_class = self.board.array[loc]
@@ -33,12 +208,23 @@ class Cell:
             Wrapper for various update processes
         """
         old_status = self.status
+        stats = self.board.game.stats
+        if stats:
+            start = stats.clock()
+
         self.update_neighbors()
+        if stats:
+            start = stats.lap('update_neighbors', start)
         self.update_status()
+        if stats:
+            start = stats.lap('update_status', start)
+
         if self.status == old_status:
             return
         if self.cell_class != None and self.status:
             self.update_class()
+            if stats:
+                stats.lap('update_class', start)
             update = self.cell_class
         else:
             update = self.status
@@ -50,19 +236,17 @@ class Cell:
             Look at each cell adjacent to this one
             and return their values
         """
+        y, x = self.loc
+        window = board_window(self.board.array, y, y+1, x, x+1, self.board.topology)
         neighbors = []
-        for i in range(-1, 2):
-            for j in range(-1, 2):
-                if (i, j) == (0, 0):
-                    continue
-                try:
-                    y, x = self.loc[0]+i, self.loc[1]+j
-                    neighbor = self.board.array[y, x]
-                    if neighbor > 0:
-                        neighbors.append(neighbor)
-                except:
+        for i in range(3):
+            for j in range(3):
+                if (i, j) == (1, 1):
                     continue
-        
+                neighbor = window[i, j]
+                if neighbor > 0:
+                    neighbors.append(neighbor)
+
         self.neighbors = neighbors
     
     def update_status(self):
@@ -71,10 +255,7 @@ class Cell:
             and update the cells status
         """
         num_nbrs = len(self.neighbors)
-        if not 2 <= num_nbrs <= 3:
-            self.status = 0
-        elif num_nbrs == 3:
-            self.status = 1
+        self.status = int(self.board.rule[self.status, num_nbrs])
 
     def update_class(self):
         """
@@ -84,9 +265,16 @@ class Cell:
         counts = np.array([self.neighbors.count(n) for n in neighbors_set])
         probs = (counts / counts.sum()) * (1-self.mutation_prob)
         probs = np.append(probs, self.mutation_prob)
-        neighbors_set.append(np.random.choice(np.arange(1, self.board.classes)))        
+        rng = self.board.rng
+        neighbors_set.append(rng.integers(1, self.board.classes))
 
-        self.cell_class = np.random.choice(neighbors_set, p=probs)
+        # The last choice is the mutation
+        choice = rng.choice(len(neighbors_set), p=probs)
+        self.cell_class = neighbors_set[choice]
+
+        stats = self.board.game.stats
+        if stats and choice == len(neighbors_set) - 1:
+            stats.count('mutations')
 
 
 class Board:
@@ -95,70 +283,248 @@ class Board:
         It will generate new boards based on input and query cells for updates
     """
 
+    chunk = CHUNK       # Cells generated per chunk on a random board
+
     def __init__(self, game):
         self.game = game
         self.classes = game.classes
         self.shape = game.shape
         self.seed = game.seed
-        self.cells = []
+        self.topology = game.topology
+        self.rule = game.rule
+        self.rng = game.rng
+        # One byte per cell is enough for up to 255 classes
+        self.dtype = np.min_scalar_type(self.classes)
 
         self.initialize_board()
-        self.initialize_cells()
+        self.cycles = CycleDetector()
+        self.cycles.update(0, self.hash)
 
     def initialize_board(self):
         """Generates a new game board"""
-        seed = self.seed and self.seed.any()
-        if not (self.shape or seed):
+        board = self._initial_board()
+
+        self.array = board
+        self.start_array = board
+        self.prev_array = None
+        self.hash = hash_cells(np.flatnonzero(board), board[board > 0])
+
+    @property
+    def seeded(self):
+        """Whether the board starts from a (non-empty) seed"""
+        return self.seed is not None and self.seed.any()
+
+    def _initial_board(self):
+        """Builds the starting array from the game's shape and seed"""
+        if not (self.shape or self.seeded):
             raise Exception("Either a shape or a seed is required.")
 
-        elif self.shape and seed:
+        elif self.shape and self.seeded:
             # Center the seed on a game board
             board = self._center_seed(self.shape, self.seed)
 
         elif self.shape:
-            # The probability a cell starts off dead
-            prob_dead = [1 - self.game.weight]
-            # Class probabilities for live cells
-            probs_alive = [self.game.weight * (1/self.classes)] * self.classes
-
-            board = np.random.choice(
-                self.classes + 1,
-                np.prod(self.shape),
-                p = prob_dead + probs_alive
-            ).reshape(self.shape)
-            
+            board = random_board(self.rng, self.shape, self.game.weight, self.classes, self.dtype, self.chunk)
+
         else:   # Only a seed is given
             self.shape = self.seed.shape
-            board = self.seed
+            board = self.seed.astype(self.dtype)
 
-        self.array = board
-        self.start_array = board
-        self.prev_array = None
-    
-    def initialize_cells(self):
-        """Creates objects for each cell in the game board"""
-        for loc in np.ndindex(*self.shape): # TODO: see if nested for loop is faster than this
-            c = Cell(loc, self)
-            self.cells.append(c)
+        return board
 
-    # todo:
-    def next_generation(self):
+    @property
+    def status(self):
+        """Binary plane of live cells, the board itself holds each cell's class"""
+        return (self.array > 0).view(np.uint8)
+
+    @property
+    def cells(self):
+        """Lazily creates a Cell view for each location on the board"""
+        for loc in np.ndindex(*self.shape):
+            yield Cell(loc, self)
+
+    def cell(self, loc):
+        """Returns a Cell view of a single board location, with its neighbors"""
+        cell = Cell(loc, self)
+        cell.update_neighbors()
+        return cell
+
+    steps_into = True   # next_generation can write into a given array
+
+    def next_generation(self, out=None):
         """
-            Iterate to the next generation of the gameboard
+            Iterate to the next generation of the gameboard,
+            writing it into `out` if it's given
         """
-        new_board = self.array.copy()
+        if self.game.engine == 'cells':
+            new_board = self._step_cells(out)
+        else:
+            new_board = self._step_numpy(out)
+
+        stats = self.game.stats
+        if stats:
+            start = stats.clock()
+
+        # Only the indices of the cells that changed are allocated
+        differs = self._scratch()[5]
+        changed = np.flatnonzero(np.not_equal(new_board, self.array, out=differs))
+        self.hash ^= hash_cells(changed, self.array.ravel()[changed])
+        self.hash ^= hash_cells(changed, new_board.ravel()[changed])
+
+        self.prev_array = self.array
+        self.array = new_board
+        if stats:
+            start = stats.lap('hash', start)
+        self._check_cycle()
+        if stats:
+            stats.lap('cycle', start)
+
+    def _check_cycle(self):
+        """Marks the game stable once the board repeats an earlier generation"""
+        if self.cycles.update(self.game.generations, self.hash):
+            self.game.stable = True
+
+    def _step_cells(self, out=None):
+        """Updates the board one Cell object at a time"""
+        new_board = self.array.copy() if out is None else out
+        new_board[...] = self.array
         for cell in self.cells:
             cell.update(new_board)
-        
-        if np.array_equal(self.prev_array, new_board):
-            self.game.stable = True
-        else:
-            self.prev_array = self.array
-            self.array = new_board
+        return new_board
+
+    def _step_numpy(self, out=None):
+        """
+            Updates the whole board at once - neighbors are counted with
+            shifted array sums and the rules applied as boolean masks.
+            Scratch arrays are reused, so with `out` nothing board sized
+            is allocated for a single class
+        """
+        new_board = np.empty_like(self.array) if out is None else out
+        alive, padded, counts, match, new_alive, _ = self._scratch()
+        stats = self.game.stats
+        if stats:
+            start = stats.clock()
+
+        np.greater(self.array, 0, out=alive)
+        count_neighbors(pad_board(alive, self.topology, out=padded), out=counts)
+        if stats:
+            start = stats.lap('neighbors', start)
+
+        self._live_mask(alive, counts, match, new_alive)
+
+        if self.classes == 1:
+            np.copyto(new_board, new_alive)
+            if stats:
+                stats.lap('rule', start)
+            return new_board
+
+        born = new_alive & ~alive
+        np.copyto(new_board, self.array)
+        new_board[~new_alive] = 0
+        if stats:
+            start = stats.lap('rule', start)
+        if born.any():
+            new_board[born] = self._inherit_classes(pad_board(self.array, self.topology), born)
+        if stats:
+            stats.lap('classes', start)
+        return new_board
+
+    def _live_mask(self, alive, counts, match, new_alive):
+        """
+            Fills new_alive with the cells the rule leaves alive, ORing
+            together the cells with each neighbor count it keeps. A gather
+            from the table would cast the counts to intp, allocating 8 bytes
+            a cell
+        """
+        new_alive.fill(False)
+        for n in range(9):
+            born, survives = self.rule[:, n]
+            if not (born or survives):
+                continue
+            np.equal(counts, n, out=match)
+            if not born:
+                np.logical_and(match, alive, out=match)
+            elif not survives:
+                np.greater(match, alive, out=match)     # match & ~alive
+            np.logical_or(new_alive, match, out=new_alive)
+
+    def _scratch(self):
+        """Arrays reused by every call to _step_numpy"""
+        if getattr(self, '_buffers', None) is None:
+            rows, cols = self.shape
+            self._buffers = (
+                np.empty(self.shape, dtype=bool),
+                np.empty((rows+2, cols+2), dtype=bool),
+                np.empty(self.shape, dtype=np.uint8),
+                np.empty(self.shape, dtype=bool),
+                np.empty(self.shape, dtype=bool),
+                np.empty(self.shape, dtype=bool),
+            )
+        return self._buffers
+
+    def _next_region(self, current, padded):
+        """
+            Applies the rules to a region of the board, given the region
+            and a copy of it padded by a cell of its neighbors on each side
+        """
+        new_board, born = self._apply_rule(current, padded)
+        if self.classes > 1 and born.any():
+            new_board[born] = self._inherit_classes(padded, born)
+        return new_board
+
+    def _apply_rule(self, current, padded):
+        """
+            Works out which cells live and die, returning the new region
+            (with new cells set to 1) and a mask of the new cells
+        """
+        alive = current > 0
+        counts = count_neighbors(padded > 0)
+
+        new_alive = self.rule[alive.view(np.uint8), counts]
+        born = new_alive & ~alive
+        died = alive & ~new_alive
+
+        new_board = current.copy()
+        new_board[died] = 0
+        new_board[born] = 1
+        return new_board, born
+
+    def _inherit_classes(self, padded, born):
+        """
+            Picks a class for every new cell at once. Like Cell.update_class,
+            a new cell takes the class of a random live neighbor, or mutates
+            into a random class with probability Cell.mutation_prob. A single
+            uniform draw per cell decides both.
+        """
+        # Neighbor counts for each class, only kept for the new cells
+        counts = np.stack([
+            count_neighbors(padded == c)[born]
+            for c in range(1, self.classes + 1)
+        ], axis=1)
+
+        mutation_prob = Cell.mutation_prob
+        draws = self.rng.random(len(counts))
+        inherit = draws < 1 - mutation_prob
+
+        # Inherited: walk the cumulative counts to the drawn neighbor
+        totals = np.cumsum(counts, axis=1)
+        target = draws / (1 - mutation_prob) * totals[:, -1]
+        classes = (totals > target[:, None]).argmax(axis=1) + 1
+
+        stats = self.game.stats
+        if stats:
+            stats.count('mutations', int(np.count_nonzero(~inherit)))
+
+        # Mutated: the rest of the draw picks from classes 1 to classes-1
+        if not inherit.all():
+            mutated = (draws[~inherit] - (1 - mutation_prob)) / mutation_prob
+            classes[~inherit] = np.minimum((mutated * (self.classes - 1)).astype(int) + 1, self.classes - 1)
+
+        return classes
 
     def _center_seed(self, shape, seed):
         """Centers the given seed on the size of the game board"""
-        board = np.zeros(shape, dtype=int)  # Start with a blank board
+        board = np.zeros(shape, dtype=self.dtype)  # Start with a blank board
 
         # Find coordinates to place the seed array
         # Note: this assumes the seed <= the size of the game board
@@ -175,22 +541,459 @@ class Board:
     def __repr__(self):
         return str(self.array)
 
+class PackedBoard(Board):
+    """
+        A binary board packed 64 cells to a uint64 word along each row.
+        Generations are computed with bitwise adders across whole words,
+        so memory is one bit per cell. Only supports a single class.
+    """
+
+    steps_into = False
+
+    def __init__(self, game):
+        if game.classes != 1:
+            raise ValueError("The packed engine only supports classes == 1")
+        super().__init__(game)
+
+    def initialize_board(self):
+        """Generates a new packed game board"""
+        if self.shape and not self.seeded:
+            words = self._random_words()
+        else:
+            words = pack_rows(self._initial_board())
+
+        self.words = words
+        self.start_words = words
+        self.prev_words = None
+        index = np.flatnonzero(words)
+        self.hash = hash_cells(index, words.ravel()[index])
+
+    def _random_words(self):
+        """Generates a random board a few rows at a time, packing as it goes"""
+        rows, cols = self.shape
+        words = np.zeros((rows, -(-cols // 64)), dtype=np.uint64)
+        step = max(1, self.chunk // cols)
+        for r in range(0, rows, step):
+            alive = random_rows(self.rng, (min(step, rows - r), cols), self.game.weight)
+            words[r:r+step] = pack_rows(alive)
+        return words
+
+    @property
+    def array(self):
+        return unpack_rows(self.words, self.shape[1])
+
+    @property
+    def start_array(self):
+        return unpack_rows(self.start_words, self.shape[1])
+
+    @property
+    def prev_array(self):
+        if self.prev_words is not None:
+            return unpack_rows(self.prev_words, self.shape[1])
+
+    def next_generation(self):
+        """
+            Iterate to the next generation of the gameboard
+        """
+        new_words = self._step_packed()
+
+        changed = np.flatnonzero(new_words != self.words)
+        self.hash ^= hash_cells(changed, self.words.ravel()[changed])
+        self.hash ^= hash_cells(changed, new_words.ravel()[changed])
+
+        self.prev_words = self.words
+        self.words = new_words
+        self._check_cycle()
+
+    def _step_packed(self):
+        """
+            Counts the neighbors of 64 cells at a time - each of the eight
+            neighbor planes is added into a 4 bit counter held as bit planes
+        """
+        words = self.words
+        cols = self.shape[1]
+        wrap = self.topology != 'dead'
+
+        # Rows above and below
+        up = np.roll(words, 1, axis=0)
+        down = np.roll(words, -1, axis=0)
+        if self.topology == 'dead':
+            up[0] = 0
+            down[-1] = 0
+        elif self.topology == 'klein':
+            up[0] = _reverse_rows(words[-1:], cols)
+            down[-1] = _reverse_rows(words[:1], cols)
+
+        sums = [np.zeros_like(words) for _ in range(4)]
+        for plane in (
+            up, _shift_west(up, cols, wrap), _shift_east(up, cols, wrap),
+            _shift_west(words, cols, wrap), _shift_east(words, cols, wrap),
+            down, _shift_west(down, cols, wrap), _shift_east(down, cols, wrap),
+        ):
+            _add_plane(sums, plane)
+
+        # The rule table becomes an OR of the counts that leave a cell alive
+        new_words = np.zeros_like(words)
+        for n in range(9):
+            born, survives = self.rule[:, n]
+            if not (born or survives):
+                continue
+            match = ~np.zeros_like(words)
+            for i, bits in enumerate(sums):
+                match &= bits if n >> i & 1 else ~bits
+            if not born:
+                match &= words
+            elif not survives:
+                match &= ~words
+            new_words |= match
+        new_words[:, -1] &= _tail_mask(cols)
+
+        return new_words
+
+
+class ParallelBoard(Board):
+    """
+        Steps the board in horizontal bands on a pool of threads. Each band
+        reads its halo rows from a shared padded copy of the board, and
+        numpy releases the GIL inside the array kernels. Bands work in the
+        same scratch arrays as the serial engine, so nothing more is
+        allocated. New cells get their classes afterwards in a single pass,
+        so the random draws (and the boards) are identical to the serial
+        engine.
+
+        The threads are shut down by close(), or once the board is garbage
+        collected.
+    """
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.pool = ThreadPoolExecutor(game.workers)
+        # The finalizer can't hold on to self, or it would never run
+        self._cleanup = weakref.finalize(self, self.pool.shutdown, wait=False)
+        bands = np.array_split(np.arange(self.shape[0]), game.workers)
+        self.bands = [(band[0], band[-1] + 1) for band in bands if len(band)]
+
+    def close(self):
+        """Shuts down the worker threads"""
+        self._cleanup()
+
+    def _step_numpy(self, out=None):
+        new_board = np.empty_like(self.array) if out is None else out
+        alive, padded, counts, match, new_alive, _ = self._scratch()
+        np.greater(self.array, 0, out=alive)
+        pad_board(alive, self.topology, out=padded)
+
+        def step_band(band):
+            r0, r1 = band
+            count_neighbors(padded[r0:r1+2], out=counts[r0:r1])
+            self._live_mask(alive[r0:r1], counts[r0:r1], match[r0:r1], new_alive[r0:r1])
+            if self.classes == 1:
+                np.copyto(new_board[r0:r1], new_alive[r0:r1])
+
+        # list() waits for every band and raises any errors from the threads
+        list(self.pool.map(step_band, self.bands))
+        if self.classes == 1:
+            return new_board
+
+        born = new_alive & ~alive
+        np.copyto(new_board, self.array)
+        new_board[~new_alive] = 0
+        if born.any():
+            new_board[born] = self._inherit_classes(pad_board(self.array, self.topology), born)
+        return new_board
+
+
+class MemmapBoard(Board):
+    """
+        A board kept in a pair of memory-mapped files, one for the current
+        generation and one for the next, so boards can be larger than RAM.
+        The board is generated and stepped in strips of rows that stream
+        through the mapping, nothing board sized is ever held in memory.
+        The starting board isn't kept, start_array is None.
+
+        The files get unique names, so games can share a directory. They're
+        deleted by close(), or once the board is garbage collected, along
+        with the temporary directory they go in unless the game was given one.
+    """
+
+    chunk = CHUNK       # Cells per strip
+    steps_into = False
+
+    def initialize_board(self):
+        """Generates a new game board in files under the game's directory"""
+        if not (self.shape or self.seeded):
+            raise Exception("Either a shape or a seed is required.")
+        if not self.shape:
+            self.shape = self.seed.shape
+
+        directory = self.game.directory
+        temporary = directory is None
+        if temporary:
+            directory = tempfile.mkdtemp(prefix='life-')
+        self.files = []
+        for _ in range(2):
+            handle, path = tempfile.mkstemp(prefix='board-', suffix='.dat', dir=directory)
+            os.close(handle)
+            self.files.append(path)
+        # The finalizer can't hold on to self, or it would never run
+        if temporary:
+            self._cleanup = weakref.finalize(self, shutil.rmtree, directory, ignore_errors=True)
+        else:
+            self._cleanup = weakref.finalize(self, _remove_files, list(self.files))
+        self.array, self.buffer = [
+            np.memmap(path, dtype=self.dtype, mode='w+', shape=self.shape)
+            for path in self.files
+        ]
+        self.start_array = None
+        self.prev_array = None
+
+        rows, cols = self.shape
+        self.hash = 0
+        for r0, r1 in self.strips:
+            if self.seeded:
+                strip = np.zeros((r1 - r0, cols), dtype=self.dtype)
+                self._place_seed(strip, r0)
+            else:
+                strip = self._random_strip(r1 - r0)
+            self.array[r0:r1] = strip
+            self.hash ^= hash_cells(np.flatnonzero(strip) + r0 * cols, strip[strip > 0])
+
+    def close(self):
+        """Drops the mappings of the board files and deletes them"""
+        self.array = self.buffer = self.prev_array = None
+        self._cleanup()
+
+    @property
+    def strips(self):
+        rows, cols = self.shape
+        step = max(1, self.chunk // cols)
+        return [(r0, min(r0 + step, rows)) for r0 in range(0, rows, step)]
+
+    def _random_strip(self, rows):
+        """Random rows, drawn the same way as Board._initial_board"""
+        return random_rows(self.rng, (rows, self.shape[1]), self.game.weight, self.classes, self.dtype)
+
+    def _place_seed(self, strip, r0):
+        """Copies the part of the centered seed that falls in a strip"""
+        y0 = self.shape[0]//2 - self.seed.shape[0]//2
+        x0 = self.shape[1]//2 - self.seed.shape[1]//2
+        top, bottom = max(y0, r0), min(y0 + self.seed.shape[0], r0 + len(strip))
+        if top < bottom:
+            strip[top - r0:bottom - r0, x0:x0 + self.seed.shape[1]] = self.seed[top - y0:bottom - y0]
+
+    def next_generation(self):
+        """
+            Iterate to the next generation of the gameboard
+        """
+        cols = self.shape[1]
+        for r0, r1 in self.strips:
+            current = self.array[r0:r1]
+            window = board_window(self.array, r0, r1, 0, cols, self.topology)
+            new_strip = self._next_region(current, window)
+
+            changed = np.flatnonzero(new_strip != current)
+            self.hash ^= hash_cells(changed + r0 * cols, current.ravel()[changed])
+            self.hash ^= hash_cells(changed + r0 * cols, new_strip.ravel()[changed])
+            self.buffer[r0:r1] = new_strip
+
+        self.prev_array = self.array
+        self.array, self.buffer = self.buffer, self.array
+        self._check_cycle()
+
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class TiledBoard(Board):
+    """
+        A board split into square tiles that tracks which tiles changed.
+        A tile is only recomputed when it or one of its neighboring tiles
+        changed in the last generation, so settled regions cost nothing.
+    """
+
+    tile = 64
+
+    def initialize_board(self):
+        super().initialize_board()
+        rows, cols = self.shape
+        self.tiles = (-(-rows // self.tile), -(-cols // self.tile))
+        self.active = np.ones(self.tiles, dtype=bool)
+
+    def next_generation(self, out=None):
+        """
+            Iterate to the next generation of the gameboard,
+            writing it into `out` if it's given
+        """
+        # Tiles that aren't active are the same in the previous generation,
+        # so the new board is written into the previous generation's array
+        if out is not None:
+            new_board = out
+            new_board[...] = self.array
+        elif self.prev_array is None:
+            new_board = self.array.copy()
+        else:
+            new_board = self.prev_array
+
+        changed = np.zeros(self.tiles, dtype=bool)
+        for ty, tx in zip(*np.nonzero(self.active)):
+            y0, x0 = ty * self.tile, tx * self.tile
+            y1, x1 = min(y0 + self.tile, self.shape[0]), min(x0 + self.tile, self.shape[1])
+            current = self.array[y0:y1, x0:x1]
+            window = board_window(self.array, y0, y1, x0, x1, self.topology)
+            new_tile = self._next_region(current, window)
+
+            ys, xs = np.nonzero(new_tile != current)
+            if len(ys):
+                changed[ty, tx] = True
+                index = (ys + y0) * self.shape[1] + xs + x0
+                self.hash ^= hash_cells(index, current[ys, xs])
+                self.hash ^= hash_cells(index, new_tile[ys, xs])
+            new_board[y0:y1, x0:x1] = new_tile
+
+        self.prev_array = self.array
+        self.array = new_board
+        self.active = _dilate(changed, self.tile, self.shape[1], self.topology)
+        self._check_cycle()
+
+
+def _dilate(tiles, tile, cols, topology='torus'):
+    """
+        Marks every tile next to a marked tile, wrapping at the edges. On a
+        klein bottle the tiles across the top and bottom edges are the ones
+        under the columns mirrored left to right
+    """
+    grown = tiles | np.roll(tiles, 1, 1) | np.roll(tiles, -1, 1)
+    up, down = np.roll(grown, 1, 0), np.roll(grown, -1, 0)
+    if topology == 'klein':
+        up[0] = _mirror_tiles(grown[-1], tile, cols)
+        down[-1] = _mirror_tiles(grown[0], tile, cols)
+    return grown | up | down
+
+
+def _mirror_tiles(row, tile, cols):
+    """The tiles covering a row of tiles' columns flipped left to right"""
+    cells = np.repeat(row, tile)[:cols][::-1]
+    return np.logical_or.reduceat(cells, np.arange(0, cols, tile))
+
+
+class History:
+    """
+        The ring buffer of boards kept by Life.iter_generations.
+        history[0] is the latest board, history[1] the one before, and so on,
+        each returned as a read-only view into the buffer.
+    """
+
+    def __init__(self, ring):
+        self.ring = ring
+        self.latest = 0
+        self.filled = 1
+
+    @property
+    def next_slot(self):
+        """The array the next generation will be written into"""
+        return self.ring[(self.latest + 1) % len(self.ring)]
+
+    def push(self):
+        """Moves on to the next slot once it's been written"""
+        self.latest = (self.latest + 1) % len(self.ring)
+        self.filled = min(self.filled + 1, len(self.ring))
+
+    def __len__(self):
+        return self.filled
+
+    def __getitem__(self, back):
+        if not 0 <= back < self.filled:
+            raise IndexError(f'only {self.filled} generations are kept')
+        view = self.ring[(self.latest - back) % len(self.ring)].view()
+        view.flags.writeable = False
+        return view
+
+
+ENGINES = {
+    'numpy': Board,
+    'cells': Board,
+    'packed': PackedBoard,
+    'tiled': TiledBoard,
+    'memmap': MemmapBoard,
+    'hashlife': HashLifeBoard,
+    'sparse': SparseBoard,
+}
+
+
 class Life:
-    """Docstring"""
+    """
+        Conway's Game of Life
+
+         Parameters:
+        -------------------
+        shape (tuple):      rows and columns of the game board
+        seed (np.array):    starting cells, centered on the board if a shape is given
+        weight (float):     probability a cell starts alive on a random board
+        classes (int):      number of classes live cells can belong to
+        engine (str):       'numpy' steps the whole board as arrays,
+                            'cells' updates one Cell object at a time,
+                            'tiled' only recomputes tiles near recent changes,
+                            'memmap' keeps the board in files on disk,
+                            'packed' stores 64 cells per word (classes == 1),
+                            'hashlife' and 'sparse' run on an unbounded plane
+                            with the shape as a viewport (classes == 1)
+        topology (str):     what lies past the edges of a bounded board,
+                            'torus', 'dead' or 'klein' (see pad_board)
+        rule (str):         Life-like rulestring such as 'B36/S23' (see parse_rule)
+        workers (int):      threads stepping the numpy engine in row bands
+        random_seed (int):  seed for the game's random number generator
+        rng (Generator):    a numpy Generator to use instead, every random
+                            choice the game makes is drawn from it
+        directory (str):    where the memmap engine keeps its board files,
+                            a new temporary directory by default
+        profile:            True to collect timings and counters in
+                            self.stats (see profiling.Stats), or a path
+                            or file to also stream them to as JSON lines
+    """
 
     generations = 0
     stable = False
 
-    def __init__(self, shape=None, seed=None, weight=0.35, classes=1):
+    def __init__(self, shape=None, seed=None, weight=0.35, classes=1, engine='numpy',
+                    topology='torus', rule='B3/S23', workers=1, random_seed=None, rng=None,
+                    directory=None, profile=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {tuple(ENGINES)}")
+        if workers > 1 and engine != 'numpy':
+            raise ValueError("Only the numpy engine can use more than one worker")
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology '{topology}', expected one of {TOPOLOGIES}")
+
         self.shape = shape
         self.seed = seed
         self.weight = weight
         self.classes = classes
-        self.gameboard = Board(self)
+        self.engine = engine
+        self.topology = topology
+        self.rulestring = rule
+        self.rule = parse_rule(rule)
+        self.workers = workers
+        self.rng = rng if rng is not None else np.random.default_rng(random_seed)
+        self.directory = directory
+        if isinstance(profile, Stats) or not profile:
+            self.stats = profile or None
+        else:
+            self.stats = Stats(None if profile is True else profile)
+        self.gameboard = ParallelBoard(self) if workers > 1 else ENGINES[engine](self)
     
     @property
     def board(self):
         return self.gameboard.array
+
+    @property
+    def cycle(self):
+        """(first generation, period) once the board repeats, otherwise None"""
+        return self.gameboard.cycles.cycle
     
     @property
     def next_board(self):
@@ -198,9 +1001,80 @@ class Life:
             self.generate()
         return self.board
 
-    def generate(self):
+    def generate(self, out=None):
         self.generations += 1
-        self.gameboard.next_generation()
+        stats = self.stats
+        if stats:
+            before, start = self.board.copy(), stats.clock()
+
+        if out is None:
+            self.gameboard.next_generation()
+        else:
+            self.gameboard.next_generation(out)
+
+        if stats:
+            stats.lap('step', start)
+            stats.end_generation(self.generations, before, self.board)
+
+    def iter_generations(self, n=None, history=2):
+        """
+            Steps the game forward, yielding a read-only view of each new
+            board until n generations have passed or the game is stable.
+
+            Boards live in a ring buffer of the last `history` generations,
+            allocated once, and engines that can write straight into it do.
+            While iterating, self.history[i] looks back i generations.
+            Once iteration ends the board is copied out of the buffer, so
+            later generations never overwrite the views that were handed out.
+        """
+        if history < 2:
+            raise ValueError("history must hold at least 2 generations")
+
+        board = self.board
+        self.history = History(np.empty((history,) + board.shape, dtype=board.dtype))
+        self.history.ring[0] = board
+        steps_into = getattr(self.gameboard, 'steps_into', False)
+        if steps_into:
+            self.gameboard.array = self.history.ring[0]
+
+        count = 0
+        try:
+            while (n is None or count < n) and not self.stable:
+                slot = self.history.next_slot
+                if steps_into:
+                    self.generate(out=slot)
+                else:
+                    self.generate()
+                    slot[...] = self.board
+                self.history.push()
+                count += 1
+                yield self.history[0]
+        finally:
+            if steps_into:
+                # Engines like tiled recycle prev_array, which is a ring slot here
+                self.gameboard.array = self.board.copy()
+                self.gameboard.prev_array = None
+
+    def close(self):
+        """Releases what the engine holds on to, like worker threads or temporary board files"""
+        close = getattr(self.gameboard, 'close', None)
+        if close:
+            close()
+
+    def advance(self, n):
+        """
+            Moves the game forward n generations. The hashlife engine
+            jumps there directly, other engines step one at a time
+        """
+        if hasattr(self.gameboard, 'advance'):
+            self.generations += n
+            self.gameboard.advance(n)
+            return
+
+        for _ in range(n):
+            if self.stable:
+                break
+            self.generate()
 
     # todo:
     #def stability_check
@@ -208,7 +1082,7 @@ class Life:
 if __name__ == '__main__':
     game = Life((20,20), classes=9)
     board = game.gameboard
-    cell = Cell((10,10), board)
+    cell = board.cell((10,10))
     nb = board.array.copy()
     print(cell.neighbors)
     cell.update(nb)
@@ -0,0 +1,52 @@
+import numpy as np
+from collections import deque
+
+
+def mix(values):
+    """Scrambles integers into well spread 64 bit hashes (splitmix64)"""
+    z = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def hash_cells(index, values):
+    """
+        XORs together a hash for each (flat index, value) pair. Dead cells
+        hash to 0, so a board's hash can be updated by hashing only the
+        cells that changed, once with their old values and once with the new
+    """
+    hashes = (mix(index) | np.uint64(1)) * values.astype(np.uint64)
+    return int(np.bitwise_xor.reduce(hashes)) if len(hashes) else 0
+
+
+class CycleDetector:
+    """
+        Keeps a rolling history of board hashes and reports the first
+        repeat as (start generation, period). Only the last `history`
+        generations are remembered, so longer periods go unnoticed.
+    """
+
+    history = 1024
+
+    def __init__(self):
+        self.seen = {}
+        self.order = deque()
+        self.cycle = None
+
+    def update(self, generation, key):
+        """Records a generation's hash, returning the cycle if it's a repeat"""
+        if self.cycle is None and key in self.seen:
+            start = self.seen[key]
+            self.cycle = (start, generation - start)
+
+        self.seen[key] = generation
+        self.order.append((generation, key))
+        if len(self.order) > self.history:
+            old_generation, old_key = self.order.popleft()
+            if self.seen[old_key] == old_generation:
+                del self.seen[old_key]
+        return self.cycle
+
+    def reset(self):
+        self.__init__()
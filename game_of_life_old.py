@@ -246,15 +246,14 @@ class Life:
         current_state = self.grid[x, y]
         alive_neighbors = 0
 
+        # Cells past the edges wrap around to the other side
+        rows, columns = self.grid.shape
         for i in range(-1, 2):
             for j in range(-1, 2):
-                try:
-                    if (i, j) == (0, 0):
-                        continue
-                    elif self.grid[x+i, y+j]:
-                        alive_neighbors += 1
-                except:
+                if (i, j) == (0, 0):
                     continue
+                elif self.grid[(x+i) % rows, (y+j) % columns]:
+                    alive_neighbors += 1
         
         if current_state:
             if alive_neighbors < 2 or alive_neighbors > 3:
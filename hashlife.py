@@ -0,0 +1,291 @@
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from unbounded import UnboundedBoard
+
+
+class Node:
+    """
+        A square quadtree node of side 2**level. Nodes are canonical, there
+        is only ever one node for a given set of children, so two regions
+        of the plane are equal exactly when their nodes are the same object
+    """
+
+    __slots__ = ('level', 'nw', 'ne', 'sw', 'se', 'population', '__weakref__')
+
+    def __init__(self, level, nw=None, ne=None, sw=None, se=None, population=0):
+        self.level = level
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.population = population
+
+    def __repr__(self):
+        return f'Node(level={self.level}, population={self.population})'
+
+
+OFF = Node(0, population=0)
+ON = Node(0, population=1)
+
+
+class HashLife:
+    """
+        Memoized quadtree stepping for unbounded Life patterns
+
+        Nodes are hash-consed in a weak table so identical regions share
+        one node, and the results of advancing a node are kept in a bounded
+        LRU cache. Advancing a node of level k by 2**j generations costs
+        about the same as a single generation once the cache is warm.
+
+         Parameters:
+        -------------------
+        rule (np.array):    rule table, see conways.parse_rule
+        cache_size (int):   maximum number of memoized results
+    """
+
+    def __init__(self, rule, cache_size=1 << 20):
+        if rule[0, 0]:
+            raise ValueError("Rules with B0 can't run on an unbounded plane")
+        self.rule = rule
+        self.cache_size = cache_size
+        self._nodes = weakref.WeakValueDictionary()
+        self._results = OrderedDict()
+        self._empty = [OFF]
+        self._base = {}
+
+    def join(self, nw, ne, sw, se):
+        """Returns the canonical node with the given quadrants"""
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            population = nw.population + ne.population + sw.population + se.population
+            node = Node(nw.level + 1, nw, ne, sw, se, population)
+            self._nodes[key] = node
+        return node
+
+    def empty(self, level):
+        """Returns the empty node of the given level"""
+        while len(self._empty) <= level:
+            e = self._empty[-1]
+            self._empty.append(self.join(e, e, e, e))
+        return self._empty[level]
+
+    def centre(self, node):
+        """Pads a node with empty space, keeping it at the center"""
+        e = self.empty(node.level - 1)
+        return self.join(
+            self.join(e, e, e, node.nw), self.join(e, e, node.ne, e),
+            self.join(e, node.sw, e, e), self.join(node.se, e, e, e)
+        )
+
+    def inner(self, node):
+        """The centered subnode at one level below"""
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def crop(self, node):
+        """Removes empty padding while keeping the node centered"""
+        while node.level > 3 and self.inner(node).population == node.population:
+            node = self.inner(node)
+        return node
+
+    def step(self, node, j):
+        """
+            Returns the center of a node (one level down)
+            advanced by 2**j generations, where j <= level - 2
+        """
+        if node.population == 0:
+            return node.nw
+
+        j = min(j, node.level - 2)
+        key = (node, j)
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            return result
+
+        if node.level == 2:
+            result = self._step_base(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            join = self.join
+            # Nine overlapping subnodes, each one advanced by 2**j
+            # (or 2**(j-1) when taking the full jump in two halves)
+            half = j == node.level - 2
+            k = j - 1 if half else j
+            grid = [
+                [nw, join(nw.ne, ne.nw, nw.se, ne.sw), ne],
+                [join(nw.sw, nw.se, sw.nw, sw.ne), self.inner(node), join(ne.sw, ne.se, se.nw, se.ne)],
+                [sw, join(sw.ne, se.nw, sw.se, se.sw), se],
+            ]
+            c = [[self.step(sub, k) if half else self.inner(sub) for sub in row] for row in grid]
+
+            quads = [
+                join(c[0][0], c[0][1], c[1][0], c[1][1]), join(c[0][1], c[0][2], c[1][1], c[1][2]),
+                join(c[1][0], c[1][1], c[2][0], c[2][1]), join(c[1][1], c[1][2], c[2][1], c[2][2]),
+            ]
+            result = join(*[self.step(q, k) for q in quads])
+
+        self._results[key] = result
+        if len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+        return result
+
+    def _step_base(self, node):
+        """Advances the center 2x2 of a 4x4 node by a single generation"""
+        cells = [
+            leaf.population
+            for pair in ((node.nw, node.ne), (node.sw, node.se))
+            for row in (('nw', 'ne'), ('sw', 'se'))
+            for quad in pair
+            for leaf in (getattr(quad, row[0]), getattr(quad, row[1]))
+        ]
+        key = sum(bit << i for i, bit in enumerate(cells))
+        result = self._base.get(key)
+        if result is None:
+            leaves = []
+            for y, x in ((1, 1), (1, 2), (2, 1), (2, 2)):
+                count = sum(
+                    cells[(y + i) * 4 + x + j]
+                    for i in (-1, 0, 1) for j in (-1, 0, 1) if i or j
+                )
+                alive = self.rule[cells[y * 4 + x], count]
+                leaves.append(ON if alive else OFF)
+            result = self._base[key] = self.join(*leaves)
+        return result
+
+    def advance(self, node, generations):
+        """
+            Advances a centered node by any number of generations,
+            jumping by the powers of two that make up the total
+        """
+        j = 0
+        while generations:
+            if generations & 1:
+                # Pad until the pattern sits in the inner quarter, plus one
+                # more level so nothing can escape the returned center
+                while node.level < max(j + 2, 3) or self.inner(self.inner(node)).population != node.population:
+                    node = self.centre(node)
+                node = self.step(self.centre(node), j)
+            generations >>= 1
+            j += 1
+        return self.crop(node)
+
+    def from_array(self, array, origin=(0, 0)):
+        """
+            Builds a centered node from a dense array, with array[0, 0]
+            at the plane coordinate `origin` (row, column)
+        """
+        rows, cols = array.shape
+        top, left = origin
+        extent = max(abs(top), abs(left), abs(top + rows), abs(left + cols), 2)
+        level = max(int(extent - 1).bit_length() + 1, 3)
+        half = 1 << (level - 1)
+
+        board = np.zeros((2 * half, 2 * half), dtype=np.uint8)
+        board[top+half:top+half+rows, left+half:left+half+cols] = array > 0
+        return self._build(board, level)
+
+    def _build(self, board, level):
+        if level == 0:
+            return ON if board[0, 0] else OFF
+        if not board.any():
+            return self.empty(level)
+        h = 1 << (level - 1)
+        return self.join(
+            self._build(board[:h, :h], level - 1), self._build(board[:h, h:], level - 1),
+            self._build(board[h:, :h], level - 1), self._build(board[h:, h:], level - 1),
+        )
+
+    def to_array(self, node, window):
+        """
+            Renders the part of a centered node inside window, given as
+            (top, left, rows, columns) in plane coordinates
+        """
+        top, left, rows, cols = window
+        array = np.zeros((rows, cols), dtype=np.uint8)
+        half = 1 << (node.level - 1)
+        self._fill(array, node, -half - top, -half - left)
+        return array
+
+    def _fill(self, array, node, y, x):
+        size = 1 << node.level
+        if (node.population == 0 or y >= array.shape[0] or x >= array.shape[1]
+                or y + size <= 0 or x + size <= 0):
+            return
+        if node.level == 0:
+            array[y, x] = 1
+            return
+        h = size >> 1
+        self._fill(array, node.nw, y, x)
+        self._fill(array, node.ne, y, x + h)
+        self._fill(array, node.sw, y + h, x)
+        self._fill(array, node.se, y + h, x + h)
+
+    def bounding_box(self, node):
+        """Returns (top, left, rows, columns) around every live cell"""
+        if node.population == 0:
+            return (0, 0, 0, 0)
+        half = 1 << (node.level - 1)
+        top, left, bottom, right = self._bounds(node, -half, -half)
+        return (top, left, bottom - top, right - left)
+
+    def _bounds(self, node, y, x):
+        if node.level == 0:
+            return (y, x, y + 1, x + 1)
+        h = 1 << (node.level - 1)
+        found = [
+            self._bounds(sub, y + dy, x + dx)
+            for sub, dy, dx in ((node.nw, 0, 0), (node.ne, 0, h), (node.sw, h, 0), (node.se, h, h))
+            if sub.population
+        ]
+        return (
+            min(b[0] for b in found), min(b[1] for b in found),
+            max(b[2] for b in found), max(b[3] for b in found),
+        )
+
+
+class HashLifeBoard(UnboundedBoard):
+    """
+        A Board backed by a HashLife quadtree on an unbounded plane.
+        The game's shape is only a viewport centered on the origin,
+        patterns are free to grow past it.
+    """
+
+    engine = 'hashlife'
+
+    def __init__(self, game):
+        self.hashlife = HashLife(game.rule)
+        super().__init__(game)
+
+    def _from_array(self, board, top, left):
+        return self.hashlife.crop(self.hashlife.from_array(board, (top, left)))
+
+    def _render(self, root, window):
+        return self.hashlife.to_array(root, window)
+
+    def _step(self, root):
+        return self.hashlife.advance(root, 1)
+
+    @property
+    def key(self):
+        # Canonical nodes make the cropped root itself a key for the board
+        return self.pattern
+
+    @property
+    def population(self):
+        return self.pattern.population
+
+    def bounding_box(self):
+        return self.hashlife.bounding_box(self.pattern)
+
+    def advance(self, generations):
+        """Jumps forward any number of generations at once"""
+        self.prev_pattern = None
+        self.pattern = self.hashlife.advance(self.pattern, generations)
+
+        # Skipped generations could hide a cycle's start, so begin again
+        self.cycles.reset()
+        self.cycles.update(self.game.generations, self.key)
@@ -1,17 +1,110 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
-import matplotlib.pyplot as plt
 
-from skimage import io, color, filters
-from skimage.transform import resize, rotate
-from skimage.color import rgb2gray
+from skimage import io
 
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'life-seeds')
+EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tif', '.tiff')
 
-def process_image(filepath='image_1318.jpg', shape=None, threshold=0.5):
-    image = io.imread(filepath)
-    grayscale = rgb2gray(image)
+# rgb2gray's weights as integers out of 10000
+WEIGHTS = np.array([2125, 7154, 721], dtype=np.uint32)
 
+
+def to_ubyte(image):
+    """
+        Scales an image of any dtype to 0-255 by its dtype's range, like
+        skimage's img_as_ubyte. Floats are taken to run from 0 to 1
+    """
+    image = np.asarray(image)
+    if image.dtype == np.uint8:
+        return image
+    if image.dtype == bool:
+        return image.astype(np.uint8) * 255
+    if np.issubdtype(image.dtype, np.floating):
+        return np.round(np.clip(image, 0, 1) * 255).astype(np.uint8)
+    if np.issubdtype(image.dtype, np.signedinteger):
+        # Negative values are clipped, the positive half is the range
+        bits = image.dtype.itemsize * 8 - 1
+        return (np.clip(image, 0, None) >> (bits - 8)).astype(np.uint8)
+    return (image >> (image.dtype.itemsize * 8 - 8)).astype(np.uint8)
+
+
+def luminance(image):
+    """Integer grayscale (0-255) of an image, weighted like rgb2gray"""
+    image = to_ubyte(image)
+    if image.ndim == 2:
+        return image
+    if image.shape[-1] < 3:
+        # Gray with an alpha channel, the alpha is dropped like rgb2gray does
+        return image[..., 0]
+    rgb = image[..., :3].astype(np.uint32)
+    return ((rgb @ WEIGHTS + 5000) // 10000).astype(np.uint8)
+
+
+def downsample(gray, shape):
+    """
+        Resizes a grayscale image by averaging the area each new pixel covers,
+        using integer sums. Axes that grow take the nearest pixel instead
+    """
+    for axis, size in enumerate(shape):
+        length = gray.shape[axis]
+        if size >= length:
+            gray = np.take(gray, np.arange(size) * length // size, axis=axis)
+        else:
+            edges = np.arange(size + 1) * length // size
+            sums = np.add.reduceat(gray.astype(np.uint32), edges[:-1], axis=axis)
+            counts = np.diff(edges).reshape([-1 if a == axis else 1 for a in range(gray.ndim)])
+            gray = (sums // counts).astype(np.uint8)
+    return gray
+
+
+def image_to_seed(image, shape=None, threshold=0.5):
+    """Turns an image array into a seed, dark pixels (at or below threshold) are alive"""
+    gray = luminance(image)
     if shape:
-        grayscale = resize(grayscale, shape)
-    
-    return (grayscale <= threshold).astype(int)
\ No newline at end of file
+        gray = downsample(gray, shape)
+    return (gray <= round(threshold * 255)).view(np.uint8)
+
+
+def _cache_path(filepath, shape, threshold):
+    with open(filepath, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:32]
+    size = 'x'.join(str(n) for n in shape) if shape else 'full'
+    return os.path.join(CACHE_DIR, f'{digest}-{size}-{threshold}.npz')
+
+
+def process_image(filepath='image_1318.jpg', shape=None, threshold=0.5, cache=True):
+    """
+        Reads an image file into a seed for Life(seed=...). Results are cached
+        bit-packed, keyed by the file's hash, the shape and the threshold,
+        so the same artwork only has to be processed once
+    """
+    path = _cache_path(filepath, shape, threshold) if cache else None
+    if path and os.path.exists(path):
+        cached = np.load(path)
+        rows, cols = cached['shape']
+        return np.unpackbits(cached['bits'], count=rows * cols).reshape(rows, cols)
+
+    seed = image_to_seed(io.imread(filepath), shape, threshold)
+
+    if path:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        np.savez(path, bits=np.packbits(seed), shape=seed.shape)
+    return seed
+
+
+def convert_directory(directory, shape=None, threshold=0.5, workers=None):
+    """
+        Processes every image in a directory on a process pool,
+        returning a {path: seed} dict. Seeds go through the cache as well
+    """
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(EXTENSIONS)
+    )
+    with ProcessPoolExecutor(workers) as pool:
+        seeds = pool.map(process_image, paths, [shape] * len(paths), [threshold] * len(paths))
+        return dict(zip(paths, seeds))
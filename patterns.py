@@ -0,0 +1,205 @@
+import os
+import re
+
+import numpy as np
+
+RLE_HEADER = re.compile(r'x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*(\S+))?', re.I)
+RLE_TOKEN = re.compile(r'(\d*)([a-zA-Z.$!])')
+CHUNK = 1 << 16
+
+
+def _open(source, mode='r'):
+    """Opens a path, or passes an open file straight through"""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, mode)
+    return _Unclosed(source)
+
+
+class _Unclosed:
+    """Lets a file handed in by the caller be used in a with block without closing it"""
+
+    def __init__(self, file):
+        self.file = file
+
+    def __enter__(self):
+        return self.file
+
+    def __exit__(self, *exc):
+        pass
+
+
+def load_rle(source):
+    """
+        Reads a pattern in run length encoded (.rle) format. Multi-state
+        patterns are read with states A-X as classes 1-24. The body is
+        parsed a chunk at a time, token by token, so very large patterns
+        don't need to be held in memory as text.
+
+         Returns:
+        -------------------
+        seed (np.array):    uint8 array of the pattern
+    """
+    with _open(source) as f:
+        line = f.readline()
+        while line.startswith('#') or not line.strip():
+            if not line:
+                raise ValueError('RLE pattern has no header line')
+            line = f.readline()
+
+        header = RLE_HEADER.match(line.strip())
+        if not header:
+            raise ValueError(f'Bad RLE header: {line.strip()}')
+        cols, rows = int(header[1]), int(header[2])
+        seed = np.zeros((rows, cols), dtype=np.uint8)
+
+        y = x = 0
+        tail = ''
+        for chunk in iter(lambda: f.read(CHUNK), ''):
+            text = tail + ''.join(chunk.split())
+            end = 0
+            for match in RLE_TOKEN.finditer(text):
+                end = match.end()
+                count = int(match[1] or 1)
+                tag = match[2]
+                if tag == '!':
+                    return seed
+                elif tag == '$':
+                    y += count
+                    x = 0
+                    continue
+                elif tag in 'b.':
+                    state = 0
+                elif tag == 'o':
+                    state = 1
+                elif 'A' <= tag <= 'X':
+                    state = ord(tag) - ord('A') + 1
+                else:
+                    raise ValueError(f"Unsupported RLE state '{tag}'")
+
+                if state:
+                    seed[y, x:x + count] = state
+                x += count
+            # A run count can be split from its tag by the chunk boundary
+            tail = text[end:]
+    return seed
+
+
+def load_life106(source):
+    """
+        Reads a pattern in Life 1.06 format, a list of live "x y"
+        coordinates, into an array just big enough to hold it
+    """
+    with _open(source) as f:
+        coords = np.loadtxt(f, comments='#', dtype=np.int64, ndmin=2)
+
+    if not len(coords):
+        return np.zeros((0, 0), dtype=np.uint8)
+    xs, ys = coords[:, 0] - coords[:, 0].min(), coords[:, 1] - coords[:, 1].min()
+    seed = np.zeros((ys.max() + 1, xs.max() + 1), dtype=np.uint8)
+    seed[ys, xs] = 1
+    return seed
+
+
+def load_cells(source):
+    """
+        Reads a pattern in plaintext (.cells) format, where 'O' is a live
+        cell and '.' a dead one. Lines starting with '!' are comments
+    """
+    with _open(source, 'rb') as f:
+        lines = [line.rstrip(b'\r\n') for line in f if not line.startswith(b'!')]
+
+    cols = max((len(line) for line in lines), default=0)
+    seed = np.zeros((len(lines), cols), dtype=np.uint8)
+    for y, line in enumerate(lines):
+        row = np.frombuffer(line, dtype=np.uint8)
+        seed[y, :len(row)] = (row == ord('O')) | (row == ord('*'))
+    return seed
+
+
+def save_rle(board, destination, rule='B3/S23'):
+    """
+        Writes a board in run length encoded format, using the multi-state
+        letters A-X when the board holds more than one class
+    """
+    board = np.asarray(board)
+    rows, cols = board.shape
+    multistate = board.max(initial=0) > 1
+    if board.max(initial=0) > 24:
+        raise ValueError('RLE can only hold 24 classes')
+
+    tokens = []
+    blank_rows = 0
+    for row in board:
+        # Boundaries of runs of equal cells, trailing dead cells are dropped
+        last = np.flatnonzero(row)
+        if not len(last):
+            blank_rows += 1
+            continue
+        row = row[:last[-1] + 1]
+        # Each row after the first ends the one before it with a $,
+        # blank rows in between add to its count
+        ends = blank_rows + 1 if tokens else blank_rows
+        if ends:
+            tokens.append(f'{ends if ends > 1 else ""}$')
+        blank_rows = 0
+
+        starts = np.flatnonzero(np.diff(row, prepend=-1))
+        lengths = np.diff(starts, append=len(row))
+        for state, length in zip(row[starts].tolist(), lengths.tolist()):
+            if multistate:
+                tag = chr(ord('A') + state - 1) if state else '.'
+            else:
+                tag = 'o' if state else 'b'
+            tokens.append(f'{length if length > 1 else ""}{tag}')
+    tokens.append('!')
+
+    # RLE lines shouldn't be longer than 70 characters
+    lines, line = [], ''
+    for token in tokens:
+        if len(line) + len(token) > 70:
+            lines.append(line)
+            line = ''
+        line += token
+    lines.append(line)
+
+    with _open(destination, 'w') as f:
+        f.write(f'x = {cols}, y = {rows}, rule = {rule}\n')
+        f.write('\n'.join(lines) + '\n')
+
+
+def save_life106(board, destination):
+    """Writes a board's live cells in Life 1.06 format"""
+    ys, xs = np.nonzero(board)
+    with _open(destination, 'w') as f:
+        f.write('#Life 1.06\n')
+        np.savetxt(f, np.column_stack([xs, ys]), fmt='%d')
+
+
+def save_cells(board, destination, name=None):
+    """Writes a board in plaintext (.cells) format"""
+    chars = np.frombuffer(b'.O', dtype=np.uint8)[(np.asarray(board) > 0).view(np.uint8)]
+    with _open(destination, 'wb') as f:
+        if name:
+            f.write(f'!Name: {name}\n'.encode())
+        lines = np.column_stack([chars, np.full(len(chars), ord('\n'), dtype=np.uint8)])
+        f.write(lines.tobytes())
+
+
+LOADERS = {'.rle': load_rle, '.lif': load_life106, '.life': load_life106, '.cells': load_cells}
+SAVERS = {'.rle': save_rle, '.lif': save_life106, '.life': save_life106, '.cells': save_cells}
+
+
+def load(path):
+    """Reads a pattern file, picking the format from its extension"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in LOADERS:
+        raise ValueError(f"Unknown pattern format '{ext}', expected one of {tuple(LOADERS)}")
+    return LOADERS[ext](path)
+
+
+def save(board, path):
+    """Writes a board (such as Life.board) to a pattern file, picking the format from its extension"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in SAVERS:
+        raise ValueError(f"Unknown pattern format '{ext}', expected one of {tuple(SAVERS)}")
+    SAVERS[ext](board, path)
@@ -0,0 +1,127 @@
+import json
+import time
+
+import numpy as np
+
+# Timings are bucketed by powers of two microseconds, the last bucket
+# holds everything from about 18 minutes up
+BUCKETS = 32
+COUNTERS = ('births', 'deaths', 'mutations', 'population')
+
+
+class Stats:
+    """
+        Opt-in instrumentation for a game, see Life(profile=...)
+
+        Records how long each phase of a generation takes as a histogram,
+        and the births, deaths, mutations and population of every
+        generation. Engines only call into it behind an `if stats:` check,
+        so a game without a Stats object pays next to nothing.
+
+        Phases recorded by the engines:
+        -------------------
+        step:               the whole of Life.generate, for every engine
+        neighbors:          counting neighbors (numpy engine)
+        rule:               applying the rule table (numpy engine)
+        classes:            picking classes for new cells (numpy engine)
+        update_neighbors,
+        update_status,
+        update_class:       summed over every Cell (cells engine)
+        hash:               updating the board's hash
+        cycle:              checking for a repeated board
+        render:             drawing a frame in cli.py or pygame_of_life.py
+
+         Parameters:
+        -------------------
+        stream (str/file):  JSON lines file to write a line to per generation,
+                            with its counters and phase timings
+    """
+
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, stream=None):
+        self.histograms = {}
+        self.totals = {}
+        self.series = {name: [] for name in COUNTERS}
+        self.generations = []
+
+        # Timings and counts for the generation in progress
+        self.current = {}
+        self.counts = dict.fromkeys(COUNTERS, 0)
+
+        self._owns_stream = isinstance(stream, str)
+        self.stream = open(stream, 'a') if self._owns_stream else stream
+
+    def add(self, phase, seconds):
+        """Records a timing for a phase"""
+        if phase not in self.histograms:
+            self.histograms[phase] = np.zeros(BUCKETS, dtype=np.int64)
+            self.totals[phase] = 0.0
+        bucket = min(int(seconds * 1e6).bit_length(), BUCKETS - 1)
+        self.histograms[phase][bucket] += 1
+        self.totals[phase] += seconds
+        self.current[phase] = self.current.get(phase, 0.0) + seconds
+
+    def lap(self, phase, since):
+        """Records the time since `since` for a phase, returning the current time"""
+        now = self.clock()
+        self.add(phase, now - since)
+        return now
+
+    def count(self, name, n=1):
+        """Adds to one of the counters of the generation in progress"""
+        self.counts[name] += n
+
+    def end_generation(self, generation, before, after):
+        """
+            Finishes a generation's record, given the boards on either side
+            of it. Births, deaths and population come from the boards, for the
+            unbounded engines that's only the cells inside the viewport.
+        """
+        alive, was_alive = after > 0, before > 0
+        self.counts['births'] += int(np.count_nonzero(alive & ~was_alive))
+        self.counts['deaths'] += int(np.count_nonzero(was_alive & ~alive))
+        self.counts['population'] = int(np.count_nonzero(alive))
+
+        self.generations.append(generation)
+        for name in COUNTERS:
+            self.series[name].append(self.counts[name])
+
+        if self.stream:
+            line = {'generation': generation, **self.counts, 'seconds': self.current}
+            self.stream.write(json.dumps(line) + '\n')
+
+        self.current = {}
+        self.counts = dict.fromkeys(COUNTERS, 0)
+
+    def histogram(self, phase):
+        """
+            Returns (edges, counts) for a phase's timings, bucket i
+            counts timings from edges[i] up to edges[i+1] seconds
+        """
+        edges = np.concatenate([[0], 2.0 ** np.arange(BUCKETS) / 1e6])
+        return edges, self.histograms[phase].copy()
+
+    def summary(self):
+        """Calls, total and mean seconds for each phase, and totals of the counters"""
+        phases = {
+            phase: {
+                'calls': int(counts.sum()),
+                'total': self.totals[phase],
+                'mean': self.totals[phase] / counts.sum(),
+            }
+            for phase, counts in self.histograms.items()
+        }
+        counters = {name: int(np.sum(self.series[name])) for name in ('births', 'deaths', 'mutations')}
+        return {'generations': len(self.generations), 'phases': phases, **counters}
+
+    def close(self):
+        if self._owns_stream and self.stream:
+            self.stream.close()
+        self.stream = None
+
+    def __repr__(self):
+        lines = [f'{len(self.generations)} generations']
+        for phase, s in sorted(self.summary()['phases'].items(), key=lambda item: -item[1]['total']):
+            lines.append(f'{phase:<17}{s["calls"]:>9} calls{s["total"]:>10.4f}s{s["mean"] * 1e6:>10.1f}us/call')
+        return '\n'.join(lines)
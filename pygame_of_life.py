@@ -6,6 +6,7 @@ import pygame as pg
 import numpy as np
 import scipy.stats as stats
 from conways import Life as ConwaysLife
+from runner import Runner
 
 white = (225,225,225)
 black = (0,0,0)
@@ -31,6 +32,9 @@ class Life:
         name (str):                 text in game window's title bar
         seed (np.array):            a binary array to represent starting cells
         random_weight(float):       TODO:
+        mode (str):                 'latest' skips generations when drawing falls
+                                    behind, 'every' draws each one (see runner.Runner)
+        rate (float):               generations per second, as fast as possible if None
     """
 
     clock = pg.time.Clock()
@@ -38,7 +42,7 @@ class Life:
     def __init__(self, surface=None, w=500, h=500, scale=10, offset=1,
                     active_color=(225,225,225), inactive_color=(100,100,100),
                     background_color=(0,0,0), fps=60, name="Conway's Game of Life",
-                    seed=None, random_weight=0.5):
+                    seed=None, random_weight=0.5, mode='latest', rate=None):
 
         pg.init()
         pg.display.set_caption(name)
@@ -57,6 +61,8 @@ class Life:
         self.inactive_color = inactive_color
         self.background_color = background_color
         self.fps = fps
+        self.mode = mode
+        self.rate = rate
         self.name = name
         self.seed = seed
 
@@ -65,6 +71,12 @@ class Life:
 
         self.game = ConwaysLife((self.columns, self.rows), seed=self.seed, weight=random_weight)
         self.grid = self.game.board
+
+        # The board is drawn one pixel per cell, then scaled up in one blit
+        self.cells = pg.Surface((self.rows, self.columns))
+        self.gaps = self.gap_mask()
+        self.drawn = None           # What's currently on screen
+        self.drawn_colors = None
     
     def run(self):
         """Runs the Game of Life"""
@@ -108,6 +120,9 @@ class Life:
         alive = True        # Game state - switching this to false exits the game
         paused = False
 
+        # The game steps on a background thread, frames are picked up as they're drawn
+        runner = Runner(self.game, mode=self.mode, rate=self.rate).start()
+
         while alive:
             for event in pg.event.get():
                 if event.type == pg.QUIT:
@@ -134,12 +149,17 @@ class Life:
                     if event.key == pg.K_SPACE:     # Spacebar pauses the game
                         if paused:
                             self.caption(reset=True)
+                            runner.resume()
                         else:
                             self.caption(' - Paused', append=True)
+                            runner.pause()
                         paused = not paused
                 
                     if event.key == pg.K_ESCAPE:    # Escape opens a menu
+                        runner.pause()
                         self.menu_loop()
+                        if not paused:
+                            runner.resume()
 
                     if event.key == pg.K_c:         # ctrl+w closes the game
                         mods = self.mods
@@ -147,13 +167,15 @@ class Life:
                             alive = False
 
             if not paused:
-                # Redraw and update board
-                self.surface.fill(self.background_color)
-                self.draw_grid()
-                self.grid = self.game.next_board
+                # Redraw the parts of the board that changed
+                frame = runner.poll()
+                if frame:
+                    self.grid = frame.board
+                pg.display.update(self.draw_grid())
+
+            self.clock.tick(self.fps)
 
-                pg.display.update()
-                self.clock.tick(self.fps)
+        runner.stop()
     
     def menu_loop(self):
         menu = True
@@ -173,22 +195,68 @@ class Life:
             pg.display.update()
             self.clock.tick(self.fps)
 
+        # The menu was drawn over the board, so all of it needs redrawing
+        self.drawn = None
+
     def draw_menu(self):
         width, height = (300, 400)
         xloc, yloc = self.width/2 - width/2, self.height/2 - height/2
 
         pg.draw.rect(self.surface, (0,0,0), [xloc, yloc, width, height])
 
+    def gap_mask(self):
+        """
+            A surface of the background color showing between the cells,
+            transparent over the cells themselves
+        """
+        width, height = self.rows * self.scale, self.columns * self.scale
+        gap_x = np.arange(width) % self.scale < self.offset
+        gap_y = np.arange(height) % self.scale < self.offset
+        gap = gap_x[:, None] | gap_y[None, :]
+
+        # Any color other than the background works as the transparent one
+        key = tuple(255 - c for c in self.background_color)
+        pixels = np.where(gap[..., None], self.background_color, key)
+
+        surface = pg.Surface((width, height))
+        pg.surfarray.blit_array(surface, pixels)
+        surface.set_colorkey(key)
+        return surface
+
     def draw_grid(self):
-        """Draw initial grid"""
-        for row in range(self.rows):
-            for col in range(self.columns):
-                x = row * self.scale
-                y = col * self.scale
-                offset = self.scale - self.offset
-                color = self.active_color if self.grid[col, row] else self.inactive_color
-                
-                pg.draw.rect(self.surface, color, [x+self.offset, y+self.offset, offset, offset])
+        """
+            Draws the cells that changed since the last frame, returning the
+            rectangles of the screen that need updating
+        """
+        stats = self.game.stats
+        if stats:
+            start = stats.clock()
+        alive = self.grid > 0
+        colors = (self.inactive_color, self.active_color)
+
+        if self.drawn is None or self.drawn_colors != colors or self.drawn.shape != alive.shape:
+            y0, x0, (y1, x1) = 0, 0, alive.shape
+        else:
+            changed = alive != self.drawn
+            if not changed.any():
+                return []
+            rows, cols = np.flatnonzero(changed.any(axis=1)), np.flatnonzero(changed.any(axis=0))
+            y0, y1, x0, x1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+
+        palette = np.array(colors, dtype=np.uint8)
+        pg.surfarray.blit_array(self.cells, palette[alive.view(np.uint8)].transpose(1, 0, 2))
+
+        s = self.scale
+        rect = pg.Rect(x0 * s, y0 * s, (x1 - x0) * s, (y1 - y0) * s)
+        region = self.cells.subsurface(pg.Rect(x0, y0, x1 - x0, y1 - y0))
+        self.surface.blit(pg.transform.scale(region, rect.size), rect)
+        self.surface.blit(self.gaps, rect, area=rect)
+
+        self.drawn = alive
+        self.drawn_colors = colors
+        if stats:
+            stats.lap('render', start)
+        return [rect]
 
 def main():
     life = Life()
@@ -0,0 +1,199 @@
+import json
+import mmap
+import struct
+import zlib
+
+import numpy as np
+
+MAGIC = b'LIFEREC1'
+INDEX_MAGIC = b'LIFEIDX1'
+KEYFRAME = b'K'
+DELTA = b'D'
+FRAME = struct.Struct('<cI')     # Frame kind, compressed length
+FOOTER = struct.Struct('<Q8s')  # Offset of the index, INDEX_MAGIC
+
+
+def encode_frame(data, classes, level=6):
+    """Compresses a board or XOR delta, bit-packed when there's a single class"""
+    if classes == 1:
+        data = np.packbits(data)
+    return zlib.compress(data.tobytes(), level)
+
+
+def decode_frame(payload, shape, classes, dtype):
+    """Reverses encode_frame"""
+    raw = zlib.decompress(payload)
+    if classes == 1:
+        data = np.unpackbits(np.frombuffer(raw, dtype=np.uint8), count=shape[0] * shape[1])
+    else:
+        data = np.frombuffer(raw, dtype=dtype)
+    return data.reshape(shape).astype(dtype)
+
+
+class Recorder:
+    """
+        Writes the generations of a game to a compact file
+
+        Every `keyframe_interval` generations a whole board is stored, the
+        generations in between only store the cells that changed, as the
+        XOR with the previous board. Single class boards are bit-packed,
+        and every frame is zlib compressed. An index of frame offsets is
+        written on close so Replay can seek to any generation.
+
+         Parameters:
+        -------------------
+        path (str):                 file to write
+        shape (tuple):              rows and columns of the board
+        classes (int):              number of classes on the board
+        keyframe_interval (int):    generations between whole boards
+        level (int):                zlib compression level
+    """
+
+    def __init__(self, path, shape, classes=1, keyframe_interval=64, level=6):
+        self.shape = tuple(shape)
+        self.classes = classes
+        self.keyframe_interval = keyframe_interval
+        self.level = level
+        self.dtype = np.min_scalar_type(classes)
+        self.offsets = []
+        self.previous = None
+
+        header = json.dumps({
+            'shape': self.shape,
+            'classes': classes,
+            'dtype': self.dtype.str,
+            'keyframe_interval': keyframe_interval,
+        }).encode()
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC + struct.pack('<I', len(header)) + header)
+
+    def write(self, board):
+        """Appends the next generation"""
+        board = np.asarray(board, dtype=self.dtype)
+        if board.shape != self.shape:
+            raise ValueError(f'Expected a board of shape {self.shape}, got {board.shape}')
+
+        if len(self.offsets) % self.keyframe_interval == 0:
+            kind, data = KEYFRAME, board
+        else:
+            kind, data = DELTA, board ^ self.previous
+
+        payload = encode_frame(data, self.classes, self.level)
+
+        self.offsets.append(self.file.tell())
+        self.file.write(FRAME.pack(kind, len(payload)) + payload)
+        self.previous = board.copy()
+
+    def close(self):
+        """Writes the index and closes the file"""
+        if self.file.closed:
+            return
+        index_offset = self.file.tell()
+        self.file.write(np.array(self.offsets, dtype='<u8').tobytes())
+        self.file.write(FOOTER.pack(index_offset, INDEX_MAGIC))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def record(life, path, generations, keyframe_interval=64):
+    """Records a game's current board and its next generations to a file"""
+    board = life.board
+    with Recorder(path, board.shape, life.classes, keyframe_interval) as recorder:
+        recorder.write(board)
+        for board in life.iter_generations(generations):
+            recorder.write(board)
+
+
+class Replay:
+    """
+        Random access to the generations in a file written by Recorder.
+        The file is memory-mapped, replay[n] decodes the keyframe at or before
+        generation n and applies the deltas after it. Files that were never
+        closed (so have no index) are scanned frame by frame instead.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} isn't a Life recording")
+
+        start = len(MAGIC)
+        (length,) = struct.unpack_from('<I', self.data, start)
+        header = json.loads(self.data[start + 4:start + 4 + length])
+        self.shape = tuple(header['shape'])
+        self.classes = header['classes']
+        self.dtype = np.dtype(header['dtype'])
+        self.keyframe_interval = header['keyframe_interval']
+        self.frames_start = start + 4 + length
+
+        self.offsets = self._read_index()
+        self._cache = (None, None)     # Last decoded (generation, board)
+
+    def _read_index(self):
+        """Reads the index of frame offsets, or rebuilds it from the frames"""
+        if len(self.data) >= self.frames_start + FOOTER.size:
+            index_offset, magic = FOOTER.unpack_from(self.data, len(self.data) - FOOTER.size)
+            if magic == INDEX_MAGIC:
+                end = len(self.data) - FOOTER.size
+                return np.frombuffer(self.data, dtype='<u8', count=(end - index_offset) // 8, offset=index_offset)
+
+        offsets = []
+        position = self.frames_start
+        while position + FRAME.size <= len(self.data):
+            kind, length = FRAME.unpack_from(self.data, position)
+            if kind not in (KEYFRAME, DELTA) or position + FRAME.size + length > len(self.data):
+                break   # A frame cut off part way through writing
+            offsets.append(position)
+            position += FRAME.size + length
+        return np.array(offsets, dtype=np.uint64)
+
+    def _frame(self, generation):
+        """Decompresses a single frame"""
+        offset = int(self.offsets[generation])
+        kind, length = FRAME.unpack_from(self.data, offset)
+        start = offset + FRAME.size
+        return kind, decode_frame(self.data[start:start + length], self.shape, self.classes, self.dtype)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, generation):
+        if generation < 0:
+            generation += len(self)
+        if not 0 <= generation < len(self):
+            raise IndexError(f'generation {generation} is not in the recording')
+
+        # Carry on from the last board decoded when it's on the way
+        cached, board = self._cache
+        keyframe = generation - generation % self.keyframe_interval
+        if cached is None or not keyframe <= cached <= generation:
+            cached, board = keyframe, self._frame(keyframe)[1]
+
+        for n in range(cached + 1, generation + 1):
+            board = board ^ self._frame(n)[1]
+
+        self._cache = (generation, board)
+        board = board.view()
+        board.flags.writeable = False
+        return board
+
+    def __iter__(self):
+        for generation in range(len(self)):
+            yield self[generation]
+
+    def close(self):
+        self.offsets = None
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,133 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+
+Frame = namedtuple('Frame', ['generation', 'board', 'stable'])
+MODES = ('latest', 'every')
+
+
+class Runner:
+    """
+        Steps a game on a background thread so the simulation and the
+        screen don't hold each other up. Each generation is copied into a
+        Frame and handed over through a bounded queue, the UI loop picks
+        frames up with poll() whenever it's ready to draw.
+
+        While a runner is going the worker thread owns the game, the UI
+        should only read the boards in the frames it's given.
+
+         Parameters:
+        -------------------
+        game (Life):        the game to step
+        mode (str):         'latest' keeps the simulation going at its own
+                            pace and poll() returns the newest frame, skipping
+                            any the UI didn't get to in time.
+                            'every' hands over every generation in order, the
+                            simulation waits while the queue is full
+        rate (float):       most generations per second, as fast as possible
+                            if None
+        maxsize (int):      frames the queue holds
+    """
+
+    def __init__(self, game, mode='latest', rate=None, maxsize=8):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {MODES}")
+        self.game = game
+        self.mode = mode
+        self.rate = rate
+        self.frames = queue.Queue(maxsize)
+
+        self.stopped = threading.Event()
+        self.running = threading.Event()
+        self.running.set()
+        self.error = None
+        self.thread = threading.Thread(target=self._work, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stops the worker and waits for it to finish its generation"""
+        self.stopped.set()
+        self.running.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def pause(self):
+        self.running.clear()
+
+    def resume(self):
+        self.running.set()
+
+    @property
+    def paused(self):
+        return not self.running.is_set()
+
+    def poll(self, timeout=0):
+        """
+            Returns the next frame to draw, or None if there isn't one within
+            `timeout` seconds (None waits for as long as it takes). In 'latest'
+            mode that's the newest frame, older ones are thrown away
+        """
+        if self.error:
+            raise self.error
+        try:
+            frame = self.frames.get(timeout=timeout) if timeout != 0 else self.frames.get_nowait()
+        except queue.Empty:
+            return None
+
+        if self.mode == 'latest':
+            while True:
+                try:
+                    frame = self.frames.get_nowait()
+                except queue.Empty:
+                    break
+        return frame
+
+    def _work(self):
+        try:
+            interval = 1 / self.rate if self.rate else 0
+            due = time.perf_counter()
+            while not self.stopped.is_set():
+                self.running.wait()
+                if self.stopped.is_set() or self.game.stable:
+                    # A settled board won't change, so there's nothing left to hand over
+                    self.stopped.wait(0.05)
+                    continue
+
+                self.game.generate()
+                self._put(Frame(self.game.generations, self.game.board.copy(), self.game.stable))
+
+                if interval:
+                    due = max(due + interval, time.perf_counter())
+                    self.stopped.wait(max(due - time.perf_counter(), 0))
+        except Exception as e:
+            self.error = e
+
+    def _put(self, frame):
+        if self.mode == 'latest':
+            # Make room by dropping the oldest frame, the UI would skip it anyway
+            while True:
+                try:
+                    self.frames.put_nowait(frame)
+                    return
+                except queue.Full:
+                    try:
+                        self.frames.get_nowait()
+                    except queue.Empty:
+                        pass
+
+        while not self.stopped.is_set():
+            try:
+                self.frames.put(frame, timeout=0.05)
+                return
+            except queue.Full:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,256 @@
+import argparse
+import asyncio
+import json
+import socket
+import struct
+import time
+
+import numpy as np
+
+from conways import Life
+from recording import DELTA, KEYFRAME, decode_frame, encode_frame
+
+MAGIC = b'LIFESTR1'
+MESSAGE = struct.Struct('<cQI')     # Frame kind, generation, payload length
+# Keep the kernel from queueing up lots of stale frames for a slow viewer,
+# they're better off skipped
+SEND_BUFFER = 1 << 16
+
+
+class Broadcast:
+    """
+        One generation as it's sent to viewers. The keyframe and the delta
+        from the previous broadcast are each encoded at most once, the first
+        time a viewer needs them, and shared by everyone after that
+    """
+
+    def __init__(self, generation, board, previous, classes, level):
+        self.generation = generation
+        self.board = board
+        self.previous = previous
+        self.classes = classes
+        self.level = level
+        self._keyframe = self._delta = None
+
+    @property
+    def keyframe(self):
+        if self._keyframe is None:
+            self._keyframe = self._message(KEYFRAME, self.board)
+        return self._keyframe
+
+    @property
+    def delta(self):
+        if self._delta is None:
+            self._delta = self._message(DELTA, self.board ^ self.previous.board)
+        return self._delta
+
+    def _message(self, kind, data):
+        payload = encode_frame(data, self.classes, self.level)
+        return MESSAGE.pack(kind, self.generation, len(payload)) + payload
+
+    def message_after(self, generation):
+        """What a viewer that last got `generation` should be sent"""
+        if self.previous is not None and self.previous.generation == generation:
+            return self.delta
+        return self.keyframe
+
+
+class Viewer:
+    """
+        A connected client. It only ever holds the newest broadcast it
+        hasn't been sent yet, so a slow viewer skips generations instead of
+        queueing them up or holding back the simulation
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.pending = None
+        self.sent = None        # Generation of the last broadcast written
+        self.ready = asyncio.Event()
+        self.closed = False
+
+    def offer(self, broadcast):
+        self.pending = broadcast
+        self.ready.set()
+
+    def close(self):
+        self.closed = True
+        self.ready.set()
+
+
+class Server:
+    """
+        Streams the generations of a game to any number of TCP clients.
+
+        Each client is sent a header, then frames of (kind, generation,
+        length) followed by a zlib compressed payload like recording.py's:
+        keyframes hold the whole board and deltas the XOR with the last
+        frame that client was sent, bit-packed for single class games.
+        A client that fell behind gets a keyframe of the newest generation.
+        The game is stepped on a thread so the event loop stays free to
+        serve viewers.
+
+         Parameters:
+        -------------------
+        game (Life):        the game to stream
+        host (str):         address to listen on
+        port (int):         port to listen on, 0 picks a free one
+        rate (float):       most generations per second, as fast as possible
+                            if None
+        level (int):        zlib compression level of the frames
+    """
+
+    def __init__(self, game, host='127.0.0.1', port=8765, rate=None, level=1):
+        self.game = game
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.level = level
+        self.viewers = set()
+        self.last = None
+        self.server = None
+
+        header = json.dumps({
+            'shape': game.board.shape,
+            'classes': game.classes,
+            'dtype': game.board.dtype.str,
+            'rule': game.rulestring,
+        }).encode()
+        self.header = MAGIC + struct.pack('<I', len(header)) + header
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._connect, self.host, self.port, backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.publish()
+
+    def publish(self):
+        """Offers the game's current board to every viewer"""
+        board = self.game.board.copy()
+        self.last = Broadcast(self.game.generations, board, self.last, self.game.classes, self.level)
+        # Only the one before is needed for deltas
+        if self.last.previous is not None:
+            self.last.previous.previous = None
+        for viewer in self.viewers:
+            viewer.offer(self.last)
+
+    async def simulate(self, generations=None):
+        """Steps the game, broadcasting each generation, until it's stable or `generations` have passed"""
+        interval = 1 / self.rate if self.rate else 0
+        due = time.perf_counter()
+        count = 0
+        while not self.game.stable and (generations is None or count < generations):
+            await asyncio.to_thread(self.game.generate)
+            self.publish()
+            count += 1
+
+            due = max(due + interval, time.perf_counter())
+            await asyncio.sleep(due - time.perf_counter())
+
+    async def serve(self, generations=None):
+        """Runs the game, then keeps serving its final board until cancelled"""
+        await self.start()
+        await self.simulate(generations)
+        await self.server.serve_forever()
+
+    def close(self):
+        for viewer in self.viewers:
+            viewer.close()
+        if self.server:
+            self.server.close()
+
+    async def _connect(self, reader, writer):
+        viewer = Viewer(writer)
+        self.viewers.add(viewer)
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        # Viewers never send anything, so a read only finishes when they hang up
+        hangup = asyncio.ensure_future(reader.read())
+        hangup.add_done_callback(lambda _: viewer.close())
+        try:
+            writer.write(self.header)
+            if self.last:
+                viewer.offer(self.last)
+            while True:
+                await viewer.ready.wait()
+                viewer.ready.clear()
+                if viewer.closed:
+                    break
+                broadcast = viewer.pending
+                writer.write(broadcast.message_after(viewer.sent))
+                viewer.sent = broadcast.generation
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.viewers.discard(viewer)
+            hangup.cancel()
+            writer.close()
+
+
+async def watch(host='127.0.0.1', port=8765):
+    """
+        Connects to a Server, yielding (generation, board) for every frame
+        it's sent. Stands in for a real viewer, and for testing
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        magic = await reader.readexactly(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError(f"{host}:{port} isn't a Life server")
+        (length,) = struct.unpack('<I', await reader.readexactly(4))
+        header = json.loads(await reader.readexactly(length))
+        shape, classes, dtype = tuple(header['shape']), header['classes'], np.dtype(header['dtype'])
+
+        board = None
+        while True:
+            try:
+                kind, generation, length = MESSAGE.unpack(await reader.readexactly(MESSAGE.size))
+            except asyncio.IncompleteReadError:
+                return
+            data = decode_frame(await reader.readexactly(length), shape, classes, dtype)
+            board = data if kind == KEYFRAME else board ^ data
+            yield generation, board
+    finally:
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream a game of Life to TCP clients')
+    sub = parser.add_subparsers(dest='command')
+
+    serve = sub.add_parser('serve', help='run a game and stream it')
+    serve.add_argument('--shape', type=int, nargs=2, default=(256, 256))
+    serve.add_argument('--weight', type=float, default=0.35)
+    serve.add_argument('--classes', type=int, default=1)
+    serve.add_argument('--engine', default='numpy')
+    serve.add_argument('--rule', default='B3/S23')
+    serve.add_argument('--rate', type=float, default=30, help='generations per second, 0 for no limit')
+    serve.add_argument('--generations', type=int, default=None)
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+
+    view = sub.add_parser('watch', help='connect to a server and print what it sends')
+    view.add_argument('--host', default='127.0.0.1')
+    view.add_argument('--port', type=int, default=8765)
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        game = Life(tuple(args.shape), weight=args.weight, classes=args.classes,
+                    engine=args.engine, rule=args.rule)
+        server = Server(game, args.host, args.port, rate=args.rate or None)
+        asyncio.run(server.serve(args.generations))
+    elif args.command == 'watch':
+        async def show():
+            async for generation, board in watch(args.host, args.port):
+                print(f'generation {generation}: {np.count_nonzero(board)} live cells')
+        asyncio.run(show())
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
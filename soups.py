@@ -0,0 +1,33 @@
+import numpy as np
+
+CHUNK = 1 << 22     # Cells drawn at a time on a random board
+
+
+def random_rows(rng, shape, weight, classes=1, dtype=np.uint8):
+    """
+        A random block of cells, each alive with probability `weight` and
+        split evenly between the classes. A single uint16 draw per cell
+        decides both through a lookup table, so weights are rounded to the
+        nearest 1/65536
+    """
+    threshold = round(weight * (1 << 16))
+    # What every possible draw turns into, dead past the threshold
+    lut = np.zeros(1 << 16, dtype=dtype)
+    lut[:threshold] = np.arange(threshold) * classes // threshold + 1
+
+    draws = rng.integers(0, 1 << 16, size=shape, dtype=np.uint16)
+    return lut[draws]
+
+
+def random_board(rng, shape, weight, classes=1, dtype=np.uint8, chunk=CHUNK):
+    """
+        A random board filled a few rows at a time with random_rows, to keep
+        the draws small on huge boards. Every engine builds its random boards
+        from the same rows, so a seed gives the same soup whatever the engine
+    """
+    rows, cols = shape
+    board = np.empty(shape, dtype=dtype)
+    step = max(1, chunk // cols)
+    for r in range(0, rows, step):
+        board[r:r+step] = random_rows(rng, (min(step, rows - r), cols), weight, classes, dtype)
+    return board
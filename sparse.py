@@ -0,0 +1,85 @@
+import numpy as np
+
+from cycles import mix
+from unbounded import UnboundedBoard
+
+# Live cells are stored as a sorted array of int64 keys, each packing a
+# (row, column) pair so the whole neighborhood can be found with arithmetic.
+# Coordinates can range over +/- 2**30 in both directions
+OFFSET = 1 << 30
+STRIDE = 1 << 32
+NEIGHBORS = np.array([
+    dy * STRIDE + dx
+    for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx
+], dtype=np.int64)
+
+
+def encode(ys, xs):
+    """Packs row and column coordinates into keys"""
+    return (np.asarray(ys, dtype=np.int64) + OFFSET) * STRIDE + (np.asarray(xs, dtype=np.int64) + OFFSET)
+
+
+def decode(keys):
+    """Unpacks keys into row and column coordinates"""
+    return keys // STRIDE - OFFSET, keys % STRIDE - OFFSET
+
+
+def step(keys, rule):
+    """
+        Advances a sorted array of live cell keys by one generation with
+        a rule table (see conways.parse_rule). Only live cells and their
+        neighbors are visited, so the cost grows with the population
+        rather than the area of the pattern
+    """
+    if not len(keys):
+        return keys
+
+    candidates, counts = np.unique((keys[:, None] + NEIGHBORS).ravel(), return_counts=True)
+    alive = np.isin(candidates, keys, assume_unique=True)
+    return candidates[rule[alive.view(np.uint8), counts]]
+
+
+class SparseBoard(UnboundedBoard):
+    """
+        A Board of live cell coordinates on an unbounded plane. Patterns
+        can grow without being clipped by the board, the game's shape is
+        only the viewport rendered by array, centered on the origin.
+    """
+
+    engine = 'sparse'
+
+    def _from_array(self, board, top, left):
+        ys, xs = np.nonzero(board)
+        return encode(ys + top, xs + left)
+
+    def _render(self, keys, window):
+        top, left, rows, cols = window
+        array = np.zeros((rows, cols), dtype=np.uint8)
+        ys, xs = decode(keys)
+        ys, xs = ys - top, xs - left
+        inside = (ys >= 0) & (ys < rows) & (xs >= 0) & (xs < cols)
+        array[ys[inside], xs[inside]] = 1
+        return array
+
+    def _step(self, keys):
+        return step(keys, self.rule)
+
+    @property
+    def key(self):
+        return self.hash
+
+    @property
+    def hash(self):
+        return int(np.bitwise_xor.reduce(mix(self.pattern), initial=0))
+
+    @property
+    def population(self):
+        return len(self.pattern)
+
+    def bounding_box(self):
+        """Returns (top, left, rows, columns) around every live cell"""
+        if not len(self.pattern):
+            return (0, 0, 0, 0)
+        ys, xs = decode(self.pattern)
+        top, left = ys.min(), xs.min()
+        return (int(top), int(left), int(ys.max() - top + 1), int(xs.max() - left + 1))
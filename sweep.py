@@ -0,0 +1,156 @@
+import argparse
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from conways import Cell, Life
+
+COLUMNS = [
+    'task', 'run', 'seed', 'rows', 'columns', 'weight', 'classes', 'mutation_prob',
+    'generations', 'start', 'period', 'population',
+]
+
+
+def run_seed(base_seed, params, run):
+    """
+        A reproducible seed for one run of a set of parameters. It only
+        depends on the parameters and the run, not on how the sweep's grid
+        or chunks are laid out
+    """
+    (rows, cols), weight, classes, mutation_prob = params
+    # The floats go in by their bits, so equal values always give equal seeds
+    bits = np.array([weight, mutation_prob], dtype=np.float64).view(np.uint64)
+    entropy = [base_seed, rows, cols, int(bits[0]), classes, int(bits[1]), run]
+    return int(np.random.SeedSequence(entropy).generate_state(1)[0])
+
+
+def run_task(task, params, runs, base_seed, max_generations):
+    """
+        Plays one chunk of runs for a set of parameters, returning a row
+        of results per run. Each run is seeded from its parameters and run
+        number, so a sweep gives the same results however it's split up
+    """
+    shape, weight, classes, mutation_prob = params
+    Cell.mutation_prob = mutation_prob
+
+    rows = []
+    for run in runs:
+        seed = run_seed(base_seed, params, run)
+        life = Life(shape, weight=weight, classes=classes, random_seed=seed)
+
+        while not life.stable and life.generations < max_generations:
+            life.generate()
+
+        start, period = life.cycle or (None, None)
+        rows.append([
+            task, run, seed, shape[0], shape[1], weight, classes, mutation_prob,
+            life.generations, start, period, int(np.count_nonzero(life.board)),
+        ])
+    return task, rows
+
+
+def _row_key(row):
+    """The parameters, run and seed a row of results was played with"""
+    return (int(row[3]), int(row[4]), float(row[5]), int(row[6]), float(row[7]), int(row[1]), int(row[2]))
+
+
+def _run_key(params, run, base_seed):
+    """The key (see _row_key) of the row a run writes"""
+    (rows, cols), weight, classes, mutation_prob = params
+    seed = run_seed(base_seed, params, run)
+    return (rows, cols, float(weight), classes, float(mutation_prob), run, seed)
+
+
+def completed_runs(path):
+    """
+        Keys (see _row_key) of the runs already in a results file, so a
+        sweep can pick up where it left off. Runs are matched on their
+        parameters and seed, so it doesn't matter how the sweep that wrote
+        them was chunked or what else was in its grid
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline='') as f:
+        return {_row_key(row) for row in list(csv.reader(f))[1:]}
+
+
+def sweep(path, shapes, weights, classes, mutation_probs, runs=100, chunk=10,
+            max_generations=10000, base_seed=0, workers=None):
+    """
+        Plays `runs` games for every combination of parameters on a process
+        pool, appending the results to a CSV file with one column per field.
+        Runs are handed out in chunks to keep the pool's overhead low, and
+        runs already in the file are skipped so a sweep can be resumed.
+
+         Parameters:
+        -------------------
+        path (str):             results file, created or appended to
+        shapes (list):          board shapes (rows, columns)
+        weights (list):         starting probabilities a cell is alive
+        classes (list):         numbers of classes
+        mutation_probs (list):  values for Cell.mutation_prob
+        runs (int):             games played for each combination
+        chunk (int):            games played per task
+        max_generations (int):  games still running after this are stopped
+        base_seed (int):        seed the whole sweep is derived from
+        workers (int):          processes, by default one per core
+    """
+    done = completed_runs(path)
+    pending = []
+    for params in itertools.product(shapes, weights, classes, mutation_probs):
+        todo = [run for run in range(runs) if _run_key(params, run, base_seed) not in done]
+        for start in range(0, len(todo), chunk):
+            pending.append((len(pending), params, todo[start:start + chunk]))
+
+    workers = workers or os.cpu_count()
+    new_file = not os.path.exists(path)
+    with open(path, 'a', newline='') as f, ProcessPoolExecutor(workers) as pool:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(COLUMNS)
+
+        # Only keep a couple of tasks per worker in flight at a time
+        limit = 2 * workers
+        queue = iter(pending)
+        running = set()
+        while True:
+            for task, params, chunk_runs in itertools.islice(queue, limit - len(running)):
+                running.add(pool.submit(run_task, task, params, chunk_runs, base_seed, max_generations))
+            if not running:
+                break
+
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                task, rows = future.result()
+                # Rows are written a whole task at a time
+                writer.writerows(rows)
+                f.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep a grid of Life parameters')
+    parser.add_argument('path', help='CSV file to write the results to')
+    parser.add_argument('--shapes', nargs='+', default=['32x32'], help='board shapes as ROWSxCOLUMNS')
+    parser.add_argument('--weights', type=float, nargs='+', default=[0.35])
+    parser.add_argument('--classes', type=int, nargs='+', default=[1])
+    parser.add_argument('--mutation-probs', type=float, nargs='+', default=[Cell.mutation_prob])
+    parser.add_argument('--runs', type=int, default=100)
+    parser.add_argument('--chunk', type=int, default=10)
+    parser.add_argument('--max-generations', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    shapes = [tuple(int(n) for n in shape.split('x')) for shape in args.shapes]
+    sweep(
+        args.path, shapes, args.weights, args.classes, args.mutation_probs, runs=args.runs,
+        chunk=args.chunk, max_generations=args.max_generations, base_seed=args.seed,
+        workers=args.workers,
+    )
+
+
+if __name__ == '__main__':
+    main()
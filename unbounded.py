@@ -0,0 +1,89 @@
+from cycles import CycleDetector
+from soups import random_board
+
+
+class UnboundedBoard:
+    """
+        The parts of a Board shared by the engines on an unbounded plane.
+        The game's shape is only a viewport centered on the origin,
+        patterns are free to grow past it.
+
+        Subclasses keep the pattern however suits them and fill in:
+        -------------------
+        _from_array(board, top, left):  a pattern from a board placed at (top, left)
+        _render(pattern, window):       a (top, left, rows, columns) window of a pattern
+        _step(pattern):                 the pattern a generation on
+        key:                            the current pattern's key for cycle detection
+        population, bounding_box()
+    """
+
+    engine = None   # Name used in error messages
+
+    def __init__(self, game):
+        if game.classes != 1:
+            raise ValueError(f"The {self.engine} engine only supports classes == 1")
+        if game.rule[0, 0]:
+            raise ValueError("Rules with B0 can't run on an unbounded plane")
+
+        self.game = game
+        self.classes = game.classes
+        self.shape = game.shape
+        self.seed = game.seed
+        self.rule = game.rule
+
+        self.initialize_board()
+        self.cycles = CycleDetector()
+        self.cycles.update(0, self.key)
+
+    def initialize_board(self):
+        """Generates a new game board"""
+        if self.seed is not None and self.seed.any():
+            board = self.seed
+        elif self.shape:
+            board = random_board(self.game.rng, self.shape, self.game.weight)
+        else:
+            raise Exception("Either a shape or a seed is required.")
+
+        if not self.shape:
+            self.shape = board.shape
+
+        rows, cols = board.shape
+        self.pattern = self._from_array(board, -(rows // 2), -(cols // 2))
+        self.start_pattern = self.pattern
+        self.prev_pattern = None
+
+    @property
+    def window(self):
+        """The viewport rendered by array, centered like Board._center_seed"""
+        rows, cols = self.shape
+        return (-(rows // 2), -(cols // 2), rows, cols)
+
+    @property
+    def array(self):
+        return self._render(self.pattern, self.window)
+
+    @property
+    def start_array(self):
+        return self._render(self.start_pattern, self.window)
+
+    @property
+    def prev_array(self):
+        if self.prev_pattern is not None:
+            return self._render(self.prev_pattern, self.window)
+
+    def to_array(self, window=None):
+        """Renders a (top, left, rows, columns) window, by default the whole pattern"""
+        return self._render(self.pattern, window or self.bounding_box())
+
+    def next_generation(self):
+        """
+            Iterate to the next generation of the gameboard
+        """
+        self.prev_pattern = self.pattern
+        self.pattern = self._step(self.pattern)
+
+        if self.cycles.update(self.game.generations, self.key):
+            self.game.stable = True
+
+    def __repr__(self):
+        return str(self.array)